@@ -0,0 +1,306 @@
+"""Offline batch processing without the HTTP API.
+
+Processes a directory of PDFs or a file of URLs across a process pool,
+appending one JSON line per item as it completes. Each document gets the same
+parse time and memory budget as in the API; documents that blow it are
+quarantined and fail fast on later runs. Finished items are recorded
+in a checkpoint file, so an interrupted run picks up where it stopped. Items
+that failed transiently (origin unreachable, 5xx, 429) are left out of the
+checkpoint and retried by the next run:
+
+    python batch_cli.py --urls nightly_urls.txt --output results/nightly.jsonl --workers 8
+    python batch_cli.py --pdf-dir extracts/ --output results/extracts.jsonl --index
+"""
+
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict
+from typing import List, Dict, Any, Tuple, Iterator
+import argparse
+import hashlib
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+
+import orjson
+
+from main import (pdf_downloader, BusinessRow, search_index, TransientDownloadError, parse_quarantine,
+                  parse_worker_task, limit_worker_memory)
+
+logger = logging.getLogger("batch_cli")
+
+
+def load_items(pdf_dir: str = None, url_file: str = None) -> List[Tuple[str, str]]:
+    """List ``(kind, value)`` work items from a PDF directory and/or a URL list file"""
+    items = []
+    if pdf_dir:
+        for root, _, files in os.walk(pdf_dir):
+            for name in sorted(files):
+                if name.lower().endswith('.pdf'):
+                    items.append(('file', os.path.join(root, name)))
+    if url_file:
+        with open(url_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                url = line.strip()
+                if url and not url.startswith('#'):
+                    items.append(('url', url))
+    return items
+
+
+def item_key(kind: str, value: str) -> str:
+    return f"{kind}:{value}"
+
+
+def process_item(kind: str, value: str, include_text: bool = False) -> Dict[str, Any]:
+    """Process one PDF file or URL in a worker process"""
+    started = time.perf_counter()
+    result = {
+        'item': item_key(kind, value),
+        'url': value if kind == 'url' else f"file://{os.path.abspath(value)}",
+        'status': 'failed',
+        'timestamp': datetime.now().isoformat(),
+        'data': {}
+    }
+
+    try:
+        if kind == 'file':
+            with open(value, 'rb') as f:
+                pdf_content = f.read()
+        else:
+            decision = pdf_downloader.classify_url(value)
+            if decision == 'skip' or (decision == 'probe' and pdf_downloader.probe_enabled
+                                      and not pdf_downloader.should_download(value)):
+                result['status'] = 'skipped'
+                result['reason'] = 'URL classified as non-PDF'
+                return result
+            try:
+                pdf_content = pdf_downloader.download_pdf(value)
+            except TransientDownloadError as e:
+                result['status'] = 'error'
+                result['reason'] = f"Download failed: {e}"
+                result['retryable'] = True
+                return result
+            if not pdf_content:
+                result['status'] = 'skipped'
+                result['reason'] = 'No content downloaded or content is not a PDF'
+                return result
+
+        # PDFs that blew their parse budget before fail fast
+        content_hash = hashlib.sha256(pdf_content).hexdigest()
+        quarantined = parse_quarantine.check(content_hash)
+        if quarantined:
+            result['status'] = 'timeout'
+            result['reason'] = f"Quarantined: {quarantined['detail']}"
+            return result
+
+        # Same deadline as the API's parse workers; bundles are parsed whole since there's no pool to fan out to
+        parsed = parse_worker_task('document', pdf_content, timeout=pdf_downloader.parse_pool.timeout,
+                                   defer_records_over=0)
+        if parsed.get('budget_exceeded'):
+            result['status'] = 'timeout'
+            result['reason'] = parsed['detail']
+            # Quarantined by the parent, which is the only writer of the quarantine file
+            result['quarantine'] = (content_hash, parsed['budget_exceeded'], parsed['detail'])
+            return result
+
+        result['data'] = {
+            'file_size': len(pdf_content),
+            'links': parsed['links'],
+            'content': parsed['content']
+        }
+        if include_text:
+            result['data']['raw_text'] = parsed['raw_text']
+        result['status'] = 'success'
+
+        # One row per registry record; bundled extracts yield several
+        businesses = BusinessRow.rows_from_result(result)
+        result['businesses'] = businesses
+        if businesses:
+            # Handed back so the parent process can index them as the single writer
+            document_text = ' '.join(page.get('text') or '' for page in parsed['raw_text'].get('pages', []))
+            records = parsed['content']['content_analysis'].get('registry_records')
+            result['document_texts'] = [document_text[slice(*record['span'])] for record in records] if records else [document_text]
+
+    except Exception as e:
+        result['status'] = 'error'
+        result['reason'] = str(e)
+    finally:
+        result['elapsed_s'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+class Checkpoint:
+    """Append-only record of finished item keys"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.done = {line.rstrip('\n') for line in f if line.strip()}
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def mark(self, key: str):
+        self.file.write(key + '\n')
+        self.file.flush()
+        self.done.add(key)
+
+    def close(self):
+        self.file.close()
+
+
+def run_batch(items: List[Tuple[str, str]], output_path: str, checkpoint_path: str, workers: int,
+              include_text: bool = False, index: bool = False, max_in_flight: int = 0) -> Dict[str, Any]:
+    """Process items across a process pool, writing JSONL and checkpoints as they complete"""
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    checkpoint = Checkpoint(checkpoint_path)
+    pending_items = [item for item in items if item_key(*item) not in checkpoint.done]
+    stats = {
+        'total_items': len(items),
+        'already_done': len(items) - len(pending_items),
+        'processed': 0,
+        'success': 0,
+        'skipped': 0,
+        'failed': 0,
+        'timeouts': 0,
+        'retryable': 0,
+        'businesses': 0,
+        'bytes': 0
+    }
+    max_in_flight = max_in_flight or workers * 4
+    started = time.perf_counter()
+    logger.info(f"{stats['already_done']} of {len(items)} items already done, {len(pending_items)} to process")
+
+    def start_executor() -> ProcessPoolExecutor:
+        # Workers get the parse pool's address-space cap, so a runaway parse raises MemoryError
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            max_tasks_per_child=int(os.environ.get("PARSE_WORKER_MAX_DOCUMENTS", 200)) or None,
+            initializer=limit_worker_memory,
+            initargs=(pdf_downloader.parse_pool.max_memory_mb,)
+        )
+
+    queue: Iterator[Tuple[str, str]] = iter(pending_items)
+    in_flight = {}
+    executor = start_executor()
+    try:
+        with open(output_path, 'ab') as output:
+            while True:
+                # Keep a bounded number of items submitted so huge inputs don't sit in memory as futures
+                for kind, value in queue:
+                    in_flight[executor.submit(process_item, kind, value, include_text)] = (kind, value, executor, 0)
+                    if len(in_flight) >= max_in_flight:
+                        break
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, value, submitted_to, attempts = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        # A worker died and took the pool down with it; replace the pool once per breakage
+                        if submitted_to is executor:
+                            logger.warning(f"Worker process died ({str(e)}); starting a new pool")
+                            executor.shutdown(wait=False)
+                            executor = start_executor()
+                        if attempts == 0:
+                            resubmitted = executor.submit(process_item, kind, value, include_text)
+                            in_flight[resubmitted] = (kind, value, executor, 1)
+                            continue
+                        # The item itself may well be fine, so leave it for the next run
+                        result = {'item': item_key(kind, value), 'status': 'error', 'reason': str(e),
+                                  'retryable': True}
+                    except Exception as e:
+                        result = {'item': item_key(kind, value), 'status': 'error', 'reason': str(e),
+                                  'retryable': True}
+
+                    quarantine = result.pop('quarantine', None)
+                    if quarantine:
+                        parse_quarantine.add(*quarantine)
+
+                    document_texts = result.pop('document_texts', [])
+                    if index and search_index is not None and result.get('businesses'):
+                        try:
+                            search_index.add_many([
+                                (asdict(business), document_text)
+                                for business, document_text in zip(result['businesses'], document_texts)
+                            ])
+                        except Exception as e:
+                            logger.error(f"Error indexing businesses from {result['url']}: {str(e)}")
+
+                    output.write(orjson.dumps(result, default=str) + b'\n')
+                    output.flush()
+                    # Transient failures stay out of the checkpoint so the next run retries them
+                    if result.get('retryable'):
+                        stats['retryable'] += 1
+                    else:
+                        checkpoint.mark(result['item'])
+
+                    stats['processed'] += 1
+                    stats['bytes'] += result.get('data', {}).get('file_size', 0)
+                    if result['status'] == 'success':
+                        stats['success'] += 1
+                        stats['businesses'] += len(result.get('businesses') or [])
+                    elif result['status'] == 'skipped':
+                        stats['skipped'] += 1
+                    elif result['status'] == 'timeout':
+                        stats['timeouts'] += 1
+                    else:
+                        stats['failed'] += 1
+
+                    if stats['processed'] % 50 == 0:
+                        elapsed = time.perf_counter() - started
+                        logger.info(f"{stats['processed']}/{len(pending_items)} processed "
+                                    f"({stats['processed'] / elapsed:.1f} items/s)")
+    except KeyboardInterrupt:
+        logger.warning("Interrupted - finished items are checkpointed, rerun to resume")
+        executor.shutdown(wait=False, cancel_futures=True)
+        stats['interrupted'] = True
+    else:
+        executor.shutdown(wait=True)
+    finally:
+        checkpoint.close()
+
+    elapsed = time.perf_counter() - started
+    stats['elapsed_s'] = round(elapsed, 3)
+    stats['items_per_s'] = round(stats['processed'] / elapsed, 3) if elapsed else 0
+    stats['mb_per_s'] = round(stats['bytes'] / (1024 * 1024) / elapsed, 3) if elapsed else 0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-process registry PDFs or URLs to JSONL")
+    parser.add_argument("--pdf-dir", help="Directory of PDF files (searched recursively)")
+    parser.add_argument("--urls", help="File with one URL per line")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--include-text", action="store_true", help="Keep per-page text in the output")
+    parser.add_argument("--index", action="store_true", help="Also add businesses to the search index")
+    args = parser.parse_args()
+
+    if not args.pdf_dir and not args.urls:
+        parser.error("one of --pdf-dir or --urls is required")
+
+    items = load_items(args.pdf_dir, args.urls)
+    stats = run_batch(
+        items,
+        output_path=args.output,
+        checkpoint_path=args.checkpoint or f"{args.output}.checkpoint",
+        workers=args.workers,
+        include_text=args.include_text,
+        index=args.index
+    )
+    print(orjson.dumps(stats, option=orjson.OPT_INDENT_2).decode())
+    sys.exit(1 if stats.get('interrupted') else 0)
+
+
+if __name__ == "__main__":
+    main()
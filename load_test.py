@@ -0,0 +1,237 @@
+"""Load driver for the extractor API.
+
+Pushes concurrent /extract-and-process-table uploads at the app and reports
+throughput, latency percentiles and server memory, including the parse
+workers' RSS from /metrics/memory. Pair it with
+mock_qkb_server.py so the registry links resolve against a local origin:
+
+    python load_test.py --start-servers --requests 40 --concurrency 8 --links 25
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from mock_qkb_server import build_index_pdf
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process in MB, read from /proc"""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (FileNotFoundError, PermissionError, ValueError):
+        pass
+    return None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class MemorySampler(threading.Thread):
+    """Samples a process's RSS in the background"""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[float] = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            rss = read_rss_mb(self.pid)
+            if rss is not None:
+                self.samples.append(rss)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def read_parse_worker_memory(app_url: str) -> Optional[Dict[str, Any]]:
+    """Summarise the parse workers' RSS and recent per-document peaks from /metrics/memory"""
+    try:
+        response = requests.get(f"{app_url}/metrics/memory", timeout=5)
+        response.raise_for_status()
+        parse_workers = response.json().get("parse_workers", {})
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+    worker_rss = list(parse_workers.get("worker_rss_mb", {}).values())
+    document_peaks = parse_workers.get("recent_document_peak_mb", [])
+    return {
+        "workers": len(worker_rss),
+        "total_rss_mb": round(sum(worker_rss), 1),
+        "max_worker_rss_mb": round(max(worker_rss), 1) if worker_rss else 0,
+        "max_recent_document_peak_mb": round(max(document_peaks), 1) if document_peaks else 0,
+    }
+
+
+def wait_for_health(base_url: str, timeout: float = 30) -> bool:
+    """Poll a /health endpoint until it answers"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=2).status_code == 200:
+                return True
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def start_servers(app_port: int, mock_port: int, mock_args: List[str]) -> List[subprocess.Popen]:
+    """Launch the mock origin and the app as child processes"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    mock = subprocess.Popen(
+        [sys.executable, "mock_qkb_server.py", "--port", str(mock_port)] + mock_args,
+        cwd=here, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    app = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=here,
+        env={**os.environ, "PORT": str(app_port), "HOST": "127.0.0.1"},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return [mock, app]
+
+
+def send_table_request(app_url: str, index_pdf: bytes, timeout: float) -> Dict[str, Any]:
+    """Upload one index PDF and time the response"""
+    started = time.perf_counter()
+    try:
+        response = requests.post(
+            f"{app_url}/extract-and-process-table",
+            files={"file": ("index.pdf", index_pdf, "application/pdf")},
+            timeout=timeout
+        )
+        elapsed = time.perf_counter() - started
+        businesses = 0
+        if response.status_code == 200:
+            businesses = response.json().get("businesses_found", 0)
+        return {"status": response.status_code, "latency": elapsed, "businesses": businesses,
+                "bytes": len(response.content)}
+    except requests.exceptions.RequestException as e:
+        return {"status": "error", "latency": time.perf_counter() - started, "businesses": 0,
+                "bytes": 0, "error": str(e)}
+
+
+def run_load(app_url: str, index_pdfs: List[bytes], total_requests: int, concurrency: int,
+             timeout: float, app_pid: Optional[int] = None) -> Dict[str, Any]:
+    """Run the load, cycling through ``index_pdfs``, and summarise the results"""
+    sampler = MemorySampler(app_pid) if app_pid else None
+    if sampler:
+        sampler.start()
+    # The API's RSS leaves out parse workers, which hold most of the memory a document costs
+    parse_workers_before = read_parse_worker_memory(app_url)
+
+    results = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(send_table_request, app_url, index_pdfs[i % len(index_pdfs)], timeout)
+            for i in range(total_requests)
+        ]
+        for future in as_completed(futures):
+            results.append(future.result())
+    wall_time = time.perf_counter() - started
+
+    if sampler:
+        sampler.stop()
+    parse_workers_after = read_parse_worker_memory(app_url)
+
+    latencies = [r["latency"] for r in results if r["status"] == 200]
+    status_counts: Dict[str, int] = {}
+    for r in results:
+        status_counts[str(r["status"])] = status_counts.get(str(r["status"]), 0) + 1
+
+    report = {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "wall_time_s": round(wall_time, 3),
+        "throughput_rps": round(total_requests / wall_time, 3) if wall_time else 0,
+        "statuses": status_counts,
+        "businesses_per_request": round(sum(r["businesses"] for r in results) / max(len(results), 1), 2),
+        "latency_s": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(max(latencies), 3) if latencies else 0,
+        },
+    }
+    if sampler and sampler.samples:
+        report["server_rss_mb"] = {
+            "start": round(sampler.samples[0], 1),
+            "peak": round(max(sampler.samples), 1),
+            "end": round(sampler.samples[-1], 1),
+        }
+    if parse_workers_before or parse_workers_after:
+        report["parse_workers_memory"] = {"before": parse_workers_before, "after": parse_workers_after}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /extract-and-process-table")
+    parser.add_argument("--app-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mock-url", default="http://127.0.0.1:8100", help="Base URL the index PDF links point at")
+    parser.add_argument("--requests", type=int, default=20, help="Total uploads to send")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent uploads")
+    parser.add_argument("--links", type=int, default=20, help="Registry links per index PDF")
+    parser.add_argument("--noise", type=int, default=0, help="Non-registry links per index PDF")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first index PDF; each request gets the next")
+    parser.add_argument("--distinct-uploads", type=int, default=0,
+                        help="Cycle through this many different index PDFs (default: one per request, so the "
+                             "response cache never answers)")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--app-pid", type=int, default=None, help="Sample this process's RSS during the run")
+    parser.add_argument("--start-servers", action="store_true",
+                        help="Start main.py and mock_qkb_server.py locally for the run")
+    parser.add_argument("--mock-latency", default="lognormal:120:0.5", help="Latency spec when starting the mock")
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    processes = []
+    app_pid = args.app_pid
+    try:
+        if args.start_servers:
+            app_port = int(args.app_url.rsplit(":", 1)[1])
+            mock_port = int(args.mock_url.rsplit(":", 1)[1])
+            processes = start_servers(app_port, mock_port, [
+                "--latency", args.mock_latency, "--error-rate", str(args.mock_error_rate)
+            ])
+            app_pid = processes[1].pid
+            if not (wait_for_health(args.mock_url) and wait_for_health(args.app_url)):
+                print("Servers did not become healthy", file=sys.stderr)
+                sys.exit(1)
+
+        # Identical uploads would be answered from the ETag cache, so vary the registry links per request
+        index_pdfs = [
+            build_index_pdf(args.mock_url, args.links, seed=args.seed + i, noise=args.noise)
+            for i in range(max(1, min(args.distinct_uploads or args.requests, args.requests)))
+        ]
+        report = run_load(args.app_url, index_pdfs, args.requests, args.concurrency, args.timeout, app_pid)
+        print(json.dumps(report, indent=2))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,40 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, asdict
+import orjson
+import gzip
 import PyPDF2
 import pdfplumber
 import re
 import io
 import logging
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse, urljoin, urlunparse, parse_qsl, urlencode
 import aiofiles
 import os
 import requests
+from urllib3.exceptions import ReadTimeoutError
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque, OrderedDict
+import multiprocessing
+import threading
+import weakref
+import resource
+import signal
 import hashlib
+import heapq
+import time
 from datetime import datetime
+from search_index import BusinessSearchIndex
+from work_queue import SQLiteWorkQueue
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; responses fall back to gzip
+    brotli = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +45,434 @@ app = FastAPI(title="Albanian Business Registry Extractor", version="1.0.0")
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+
+# Pre-download probe settings
+PROBE_RANGE_BYTES = 1024
+PROBE_CACHE_SIZE = int(os.environ.get("PROBE_CACHE_SIZE", 4096))
+PROBE_CACHE_TTL = float(os.environ.get("PROBE_CACHE_TTL", 3600))
+
+# Download timeouts follow each host's observed latency once enough samples exist
+DOWNLOAD_TIMEOUT_DEFAULT = float(os.environ.get("DOWNLOAD_TIMEOUT_DEFAULT", 30))
+DOWNLOAD_TIMEOUT_MIN = float(os.environ.get("DOWNLOAD_TIMEOUT_MIN", 5))
+DOWNLOAD_TIMEOUT_MAX = float(os.environ.get("DOWNLOAD_TIMEOUT_MAX", 30))
+DOWNLOAD_TIMEOUT_P99_MULTIPLIER = float(os.environ.get("DOWNLOAD_TIMEOUT_P99_MULTIPLIER", 3))
+LATENCY_MIN_SAMPLES = int(os.environ.get("LATENCY_MIN_SAMPLES", 20))
+LATENCY_WINDOW = int(os.environ.get("LATENCY_WINDOW", 500))
+
+# Hedged downloads: a duplicate request once a download outlives the host's p95
+HEDGE_DOWNLOADS = os.environ.get("HEDGE_DOWNLOADS", "true").lower() == "true"
+HEDGE_BUDGET_RATIO = float(os.environ.get("HEDGE_BUDGET_RATIO", 0.05))
+HEDGE_BUDGET_BURST = float(os.environ.get("HEDGE_BUDGET_BURST", 5))
+
+# Serialized responses cached by ETag; table ETags roll over with the freshness window
+RESPONSE_CACHE_ENTRIES = int(os.environ.get("RESPONSE_CACHE_ENTRIES", 256))
+RESPONSE_CACHE_MAX_MB = float(os.environ.get("RESPONSE_CACHE_MAX_MB", 64))
+RESPONSE_CACHE_FRESHNESS = float(os.environ.get("RESPONSE_CACHE_FRESHNESS", 3600))
+
+# Crawl mode limits
+CRAWL_MAX_DEPTH = int(os.environ.get("CRAWL_MAX_DEPTH", 5))
+CRAWL_MAX_PAGES = int(os.environ.get("CRAWL_MAX_PAGES", 1000))
+CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", 10))
+
+@dataclass(slots=True)
+class Link:
+    """A link found in a PDF"""
+    type: str
+    url: str
+    page: int
+    source: str
+
+@dataclass(slots=True)
+class BusinessRow:
+    """One row of the business registry table"""
+    source_url: str
+    nuis: str
+    business_name: str
+    legal_form: str
+    registration_date: str
+    activity_field: str
+    business_address: str
+    email: str
+    phone: str
+    status: str
+    date_generated: str
+    file_size: int
+    pages: int
+    processed_at: str
+
+    @classmethod
+    def rows_from_result(cls, result: Dict[str, Any]) -> List["BusinessRow"]:
+        """Build one row per registry record in a result; bundled extracts yield several"""
+        if not isinstance(result, dict) or result.get('status') != 'success':
+            return []
+        content = result.get('data', {}).get('content', {})
+        registry = content.get('content_analysis', {}).get('albanian_business_registry')
+        if not registry or not registry.get('is_albanian_registry') or not registry.get('business_details'):
+            return []
+        records = content['content_analysis'].get('registry_records') or [registry]
+        return [
+            cls(
+                source_url=result['url'],
+                nuis=details.get('nuis', ''),
+                business_name=details.get('business_name', ''),
+                legal_form=details.get('legal_form', ''),
+                registration_date=details.get('registration_date', ''),
+                activity_field=details.get('activity_field', ''),
+                business_address=details.get('business_address', ''),
+                email=details.get('email', ''),
+                phone=details.get('phone', ''),
+                status=details.get('status', ''),
+                date_generated=details.get('date_generated', ''),
+                file_size=result['data'].get('file_size', 0),
+                pages=content.get('summary', {}).get('total_pages', 0),
+                processed_at=result.get('timestamp', '')
+            )
+            for details in (record['business_details'] for record in records)
+        ]
+
+def json_response(request: Request, content: Any, status_code: int = 200,
+                  headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serialize with orjson and compress large bodies according to Accept-Encoding"""
+    return encoded_response(request, orjson.dumps(content, default=str), status_code, headers)
+
+def negotiate_encoding(request: Request, body_size: int) -> Optional[str]:
+    """Content encoding a body of this size gets under the request's Accept-Encoding"""
+    if body_size < COMPRESSION_MIN_SIZE:
+        return None
+    accept_encoding = request.headers.get('accept-encoding', '').lower()
+    if brotli is not None and 'br' in accept_encoding:
+        return 'br'
+    if 'gzip' in accept_encoding:
+        return 'gzip'
+    return None
+
+def representation_headers(headers: Dict[str, str], encoding: Optional[str], varies: bool = True) -> Dict[str, str]:
+    """Headers for one encoding of a response, shared by the 200 and the 304 so their ETags agree"""
+    headers = dict(headers)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+        if 'ETag' in headers:
+            # Strong validators are per representation, so each encoding gets its own tag
+            headers['ETag'] = f'{headers["ETag"][:-1]}-{encoding}"'
+    if varies:
+        headers['Vary'] = 'Accept-Encoding'
+    return headers
+
+def encoded_response(request: Request, body: bytes, status_code: int = 200,
+                     headers: Optional[Dict[str, str]] = None) -> Response:
+    """Send an already serialized JSON body, compressed according to Accept-Encoding"""
+    compressible = len(body) >= COMPRESSION_MIN_SIZE
+    encoding = negotiate_encoding(request, len(body))
+    if encoding == 'br':
+        body = brotli.compress(body, quality=4)
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=5)
+    headers = representation_headers(headers or {}, encoding, varies=compressible)
+    return Response(content=body, status_code=status_code, media_type='application/json', headers=headers)
+
+class ResponseCache:
+    """Bounded LRU of serialized JSON responses keyed by ETag"""
+    
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries: OrderedDict = OrderedDict()
+        self.size = 0
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'stored': 0, 'evicted': 0}
+    
+    def get(self, etag: str) -> Optional[bytes]:
+        with self.lock:
+            body = self.entries.get(etag)
+            if body is None:
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(etag)
+            self.stats['hits'] += 1
+            return body
+    
+    def size_of(self, etag: str) -> Optional[int]:
+        """Length of a cached body, without counting a hit or refreshing its position"""
+        with self.lock:
+            body = self.entries.get(etag)
+            return None if body is None else len(body)
+    
+    def put(self, etag: str, body: bytes):
+        if not self.max_entries or len(body) > self.max_bytes:
+            return
+        with self.lock:
+            if etag in self.entries:
+                self.size -= len(self.entries.pop(etag))
+            self.entries[etag] = body
+            self.size += len(body)
+            self.stats['stored'] += 1
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.stats['evicted'] += 1
+    
+    def describe(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'size_mb': round(self.size / (1024 * 1024), 2),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'freshness_s': RESPONSE_CACHE_FRESHNESS,
+                **self.stats
+            }
+
+response_cache = ResponseCache(RESPONSE_CACHE_ENTRIES, int(RESPONSE_CACHE_MAX_MB * 1024 * 1024))
+
+def compute_etag(endpoint: str, content_hash: str, options: Dict[str, Any], fresh: bool = False) -> str:
+    """Strong ETag over the upload's hash and the options that shape the response.
+    
+    With ``fresh`` the current RESPONSE_CACHE_FRESHNESS window is mixed in, so
+    responses built from live registry data expire.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{endpoint}\0{content_hash}\0".encode())
+    digest.update(orjson.dumps(options, option=orjson.OPT_SORT_KEYS))
+    if fresh and RESPONSE_CACHE_FRESHNESS:
+        digest.update(f"\0{int(time.time() // RESPONSE_CACHE_FRESHNESS)}".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+def etag_matches(request: Request, etag: str) -> Optional[str]:
+    """The If-None-Match tag naming this ETag (in any of its content encodings), if any"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return None
+    if header.strip() == '*':
+        return '*'
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag == etag or (tag.startswith(etag[:-1] + '-') and tag.endswith('"')):
+            return tag
+    return None
+
+def cached_response(request: Request, etag: str) -> Optional[Response]:
+    """304 if the client already holds this ETag, the cached body if we do, otherwise None"""
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    matched = etag_matches(request, etag)
+    if matched:
+        response_cache.stats['not_modified'] += 1
+        body_size = response_cache.size_of(etag)
+        if body_size is not None:
+            # Same encoding, ETag and Vary the 200 would have carried
+            encoding = negotiate_encoding(request, body_size)
+            headers = representation_headers(headers, encoding, varies=body_size >= COMPRESSION_MIN_SIZE)
+        else:
+            # Body evicted: the tag the client holds says which representation it was
+            encoding = matched[len(etag) - 1:].strip('-"') if matched.startswith(etag[:-1] + '-') else None
+            headers = representation_headers(headers, encoding, varies=encoding is not None)
+        headers.pop('Content-Encoding', None)
+        return Response(status_code=304, headers=headers)
+    body = response_cache.get(etag)
+    if body is not None:
+        return encoded_response(request, body, headers=headers)
+    return None
+
+def cacheable_response(request: Request, etag: str, content: Any, cacheable: bool = True) -> Response:
+    """Serialize a response, caching it and tagging it with its ETag unless it isn't ``cacheable``"""
+    body = orjson.dumps(content, default=str)
+    if not cacheable:
+        # Without an ETag the client can't turn a partial result into a 304 later
+        return encoded_response(request, body)
+    response_cache.put(etag, body)
+    return encoded_response(request, body, headers={'ETag': etag, 'Cache-Control': 'private, no-cache'})
+
+# Phrases that mark an Albanian business registry extract
+REGISTRY_INDICATORS = [
+    'EKSTRAKT I REGJISTRIT TREGTAR',
+    'SUBJEKTIT "PERSON FIZIK"',
+    'GJENDJA E REGJISTRIMIT',
+    'Numri unik i identifikimit të subjektit',
+    'NUIS',
+    'Emri i subjektit',
+    'Forma ligjore',
+    'Data e regjistrimit',
+    'Fusha e veprimtarisë',
+    'Vendi i ushtrimit të aktivitetit',
+    'Statusi'
+]
+
+# Field labels every complete registry extract carries
+REGISTRY_FIELD_LABELS = [
+    'NUIS',
+    'Emri i subjektit',
+    'Forma ligjore',
+    'Data e regjistrimit',
+    'Fusha e veprimtarisë',
+    'Vendi i ushtrimit të aktivitetit',
+    'Statusi'
+]
+
+# Bilingual labels returned alongside parsed registry details
+REGISTRY_FIELD_TRANSLATIONS = {
+    'nuis': {'sq': 'NUIS', 'en': 'Unique Business Identification Number'},
+    'business_name': {'sq': 'Emri i subjektit', 'en': 'Business Name'},
+    'legal_form': {'sq': 'Forma ligjore', 'en': 'Legal Form'},
+    'registration_date': {'sq': 'Data e regjistrimit', 'en': 'Registration Date'},
+    'activity_field': {'sq': 'Fusha e veprimtarisë', 'en': 'Field of Activity'},
+    'business_address': {'sq': 'Vendi i ushtrimit të aktivitetit', 'en': 'Business Address'},
+    'email': {'sq': 'E-Mail', 'en': 'Email'},
+    'phone': {'sq': 'Telefon', 'en': 'Phone'},
+    'status': {'sq': 'Statusi', 'en': 'Status'},
+    'date_generated': {'sq': 'Datë', 'en': 'Document Date'}
+}
+
+# Each extract starts with this header; exported bundles without it still repeat the NUIS line
+REGISTRY_RECORD_HEADER = re.compile(r'EKSTRAKT I REGJISTRIT TREGTAR')
+REGISTRY_NUIS_LINE = re.compile(r'Numri unik i identifikimit të subjektit')
+
+# Bundles with more records than this have their records parsed across the parse workers
+REGISTRY_PARALLEL_MIN_RECORDS = int(os.environ.get("REGISTRY_PARALLEL_MIN_RECORDS", 16))
+REGISTRY_PARALLEL_CHUNK_RECORDS = int(os.environ.get("REGISTRY_PARALLEL_CHUNK_RECORDS", 8))
+
+def split_registry_records(text: str) -> List[Tuple[int, int]]:
+    """Split text holding one or more registry extracts into (start, end) spans, one per record"""
+    starts = [match.start() for match in REGISTRY_RECORD_HEADER.finditer(text)]
+    # NUIS lines only mark records when there are no headers: a single extract can list shareholders' NUIS too
+    if not starts:
+        starts = [match.start() for match in REGISTRY_NUIS_LINE.finditer(text)]
+    if len(starts) < 2:
+        return [(0, len(text))]
+    # Text ahead of the first boundary (letterhead, bundle cover) belongs to the first record
+    starts[0] = 0
+    return list(zip(starts, starts[1:] + [len(text)]))
+
+# Replacement characters, control characters, private-use glyphs and unmapped CIDs
+GARBLED_PATTERN = re.compile(r'[\ufffd\x00-\x08\x0b\x0c\x0e-\x1f\ue000-\uf8ff]|\(cid:\d+\)')
+
+# Pages scoring below this are re-extracted with the next (slower) engine
+EXTRACTION_QUALITY_THRESHOLD = float(os.environ.get("EXTRACTION_QUALITY_THRESHOLD", 0.6))
+
+def score_text_quality(text: str) -> float:
+    """Score extracted text between 0 and 1.
+    
+    Penalises garbled characters and letter-by-letter spacing. Text that looks
+    like a registry extract is also scored on the share of field labels found,
+    since a layout-sensitive engine may have recovered the rest.
+    """
+    if not text or not text.strip():
+        return 0.0
+    
+    garbled = sum(len(match) for match in GARBLED_PATTERN.findall(text))
+    quality = max(0.0, 1.0 - 10 * garbled / len(text))
+    
+    tokens = text.split()
+    if len(tokens) >= 20:
+        single_letters = sum(1 for token in tokens if len(token) == 1 and token.isalpha())
+        if single_letters / len(tokens) > 0.4:
+            quality *= 1 - single_letters / len(tokens)
+    
+    indicators = sum(1 for indicator in REGISTRY_INDICATORS if indicator in text)
+    if indicators >= 2:
+        field_share = sum(1 for label in REGISTRY_FIELD_LABELS if label in text) / len(REGISTRY_FIELD_LABELS)
+        quality *= 0.5 + 0.5 * field_share
+    
+    return round(quality, 3)
+
+class PyPDF2Engine:
+    """Fast text extraction with PyPDF2"""
+    name = 'pypdf2'
+    
+    def extract(self, pdf_content: bytes, page_numbers: Optional[List[int]] = None) -> Dict[str, Any]:
+        """Extract text for the given 1-based pages (all pages by default)"""
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
+        extracted = {'total_pages': len(pdf_reader.pages), 'metadata': {}, 'pages': {}}
+        
+        if pdf_reader.metadata:
+            extracted['metadata'] = {
+                'title': pdf_reader.metadata.get('/Title', ''),
+                'author': pdf_reader.metadata.get('/Author', ''),
+                'subject': pdf_reader.metadata.get('/Subject', ''),
+                'creator': pdf_reader.metadata.get('/Creator', ''),
+                'producer': pdf_reader.metadata.get('/Producer', ''),
+                'creation_date': str(pdf_reader.metadata.get('/CreationDate', '')),
+                'modification_date': str(pdf_reader.metadata.get('/ModDate', ''))
+            }
+        
+        for page_num, page in enumerate(pdf_reader.pages, 1):
+            if page_numbers is not None and page_num not in page_numbers:
+                continue
+            try:
+                extracted['pages'][page_num] = {'text': page.extract_text() or ''}
+            except MemoryError:
+                raise
+            except Exception as e:
+                logging.warning(f"Error extracting text from page {page_num}: {str(e)}")
+                extracted['pages'][page_num] = {'text': '', 'error': str(e)}
+        
+        return extracted
+
+class PdfplumberEngine:
+    """Slower, layout-aware text extraction with pdfplumber"""
+    name = 'pdfplumber'
+    
+    def extract(self, pdf_content: bytes, page_numbers: Optional[List[int]] = None) -> Dict[str, Any]:
+        """Extract text for the given 1-based pages (all pages by default)"""
+        with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+            extracted = {'total_pages': len(pdf.pages), 'metadata': {}, 'pages': {}}
+            
+            for page_num, page in enumerate(pdf.pages, 1):
+                if page_numbers is not None and page_num not in page_numbers:
+                    continue
+                try:
+                    extracted['pages'][page_num] = {'text': page.extract_text() or ''}
+                except MemoryError:
+                    raise
+                except Exception as e:
+                    logging.warning(f"Error extracting text from page {page_num} with pdfplumber: {str(e)}")
+                    extracted['pages'][page_num] = {'text': '', 'error': str(e)}
+                finally:
+                    # Drop the page's cached layout objects as soon as we're done with it
+                    page.flush_cache()
+        
+        return extracted
+
+# Available engines, fastest first
+EXTRACTION_ENGINES = {engine.name: engine for engine in [PyPDF2Engine(), PdfplumberEngine()]}
+
+class EngineStats:
+    """Per-engine hit rates, aggregated in the API process from parse results"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.documents = 0
+        self.pages_by_engine: Dict[str, int] = {}
+        self.fallback_pages = 0
+        self.fallback_documents = 0
+    
+    def record(self, usage: Optional[Dict[str, Any]]):
+        if not usage:
+            return
+        with self.lock:
+            self.documents += 1
+            for engine, pages in usage.get('pages', {}).items():
+                self.pages_by_engine[engine] = self.pages_by_engine.get(engine, 0) + pages
+            self.fallback_pages += usage.get('fallback_pages', 0)
+            self.fallback_documents += 1 if usage.get('fallback_document') else 0
+    
+    def describe(self) -> Dict[str, Any]:
+        with self.lock:
+            total_pages = sum(self.pages_by_engine.values())
+            return {
+                'documents': self.documents,
+                'pages': total_pages,
+                'pages_by_engine': dict(self.pages_by_engine),
+                'hit_rates': {
+                    engine: round(pages / total_pages, 3) for engine, pages in self.pages_by_engine.items()
+                } if total_pages else {},
+                'fallback_pages': self.fallback_pages,
+                'fallback_documents': self.fallback_documents,
+                'quality_threshold': EXTRACTION_QUALITY_THRESHOLD
+            }
+
+engine_stats = EngineStats()
+
 class PDFLinkExtractor:
     def __init__(self):
         # Regex pattern to match various URL formats
@@ -37,8 +485,11 @@ class PDFLinkExtractor:
             r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
         )
     
-    def extract_links_with_pypdf2(self, pdf_content: bytes) -> List[Dict[str, Any]]:
-        """Extract links using PyPDF2 - focuses on PDF annotations and links"""
+    def extract_links_with_pypdf2(self, pdf_content: bytes, page_scores: Optional[Dict[int, float]] = None) -> List[Link]:
+        """Extract links using PyPDF2 - focuses on PDF annotations and links
+        
+        If ``page_scores`` is given it is filled with the text quality score of each page.
+        """
         links = []
         
         try:
@@ -59,12 +510,12 @@ class PDFLinkExtractor:
                                     action = annotation_obj["/A"]
                                     if "/URI" in action:
                                         uri = action["/URI"]
-                                        links.append({
-                                            "type": "annotation",
-                                            "url": uri,
-                                            "page": page_num,
-                                            "source": "pypdf2"
-                                        })
+                                        links.append(Link(
+                                            type="annotation",
+                                            url=str(uri),
+                                            page=page_num,
+                                            source="pypdf2"
+                                        ))
                     except (TypeError, AttributeError, IndexError):
                         # Skip if annotations cannot be processed
                         pass
@@ -72,79 +523,93 @@ class PDFLinkExtractor:
                 # Extract text and search for URLs
                 try:
                     text = page.extract_text()
+                    if page_scores is not None:
+                        page_scores[page_num] = score_text_quality(text)
                     if text:
                         # Find HTTP/HTTPS URLs
                         url_matches = self.url_pattern.findall(text)
                         for url in url_matches:
-                            links.append({
-                                "type": "text_url",
-                                "url": url,
-                                "page": page_num,
-                                "source": "pypdf2"
-                            })
+                            links.append(Link(
+                                type="text_url",
+                                url=url,
+                                page=page_num,
+                                source="pypdf2"
+                            ))
                         
                         # Find email addresses
                         email_matches = self.email_pattern.findall(text)
                         for email in email_matches:
-                            links.append({
-                                "type": "email",
-                                "url": f"mailto:{email}",
-                                "page": page_num,
-                                "source": "pypdf2"
-                            })
+                            links.append(Link(
+                                type="email",
+                                url=f"mailto:{email}",
+                                page=page_num,
+                                source="pypdf2"
+                            ))
                             
+                except MemoryError:
+                    raise
                 except Exception as e:
                     logger.warning(f"Error extracting text from page {page_num}: {str(e)}")
+                    if page_scores is not None:
+                        page_scores[page_num] = 0.0
                     
+        except MemoryError:
+            raise
         except Exception as e:
             logger.error(f"Error with PyPDF2 extraction: {str(e)}")
             
         return links
     
-    def extract_links_with_pdfplumber(self, pdf_content: bytes) -> List[Dict[str, Any]]:
-        """Extract links using pdfplumber - better text extraction"""
+    def extract_links_with_pdfplumber(self, pdf_content: bytes, page_numbers: Optional[List[int]] = None) -> List[Link]:
+        """Extract links using pdfplumber - better text extraction (all pages by default)"""
         links = []
         
         try:
             with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
                 for page_num, page in enumerate(pdf.pages, 1):
+                    if page_numbers is not None and page_num not in page_numbers:
+                        continue
                     # Extract text
                     text = page.extract_text()
                     if text:
                         # Find HTTP/HTTPS URLs
                         url_matches = self.url_pattern.findall(text)
                         for url in url_matches:
-                            links.append({
-                                "type": "text_url",
-                                "url": url,
-                                "page": page_num,
-                                "source": "pdfplumber"
-                            })
+                            links.append(Link(
+                                type="text_url",
+                                url=url,
+                                page=page_num,
+                                source="pdfplumber"
+                            ))
                         
                         # Find email addresses
                         email_matches = self.email_pattern.findall(text)
                         for email in email_matches:
-                            links.append({
-                                "type": "email",
-                                "url": f"mailto:{email}",
-                                "page": page_num,
-                                "source": "pdfplumber"
-                            })
+                            links.append(Link(
+                                type="email",
+                                url=f"mailto:{email}",
+                                page=page_num,
+                                source="pdfplumber"
+                            ))
                     
                     # Extract hyperlinks (if available)
                     try:
                         hyperlinks = page.hyperlinks
                         if hyperlinks:
                             for link in hyperlinks:
-                                links.append({
-                                    "type": "hyperlink",
-                                    "url": link.get("uri", ""),
-                                    "page": page_num,
-                                    "source": "pdfplumber"
-                                })
+                                links.append(Link(
+                                    type="hyperlink",
+                                    url=link.get("uri") or "",
+                                    page=page_num,
+                                    source="pdfplumber"
+                                ))
+                    except MemoryError:
+                        raise
                     except Exception as e:
                         logger.warning(f"Error extracting hyperlinks from page {page_num}: {str(e)}")
                         
+        except MemoryError:
+            raise
         except Exception as e:
             logger.error(f"Error with pdfplumber extraction: {str(e)}")
             
@@ -155,32 +620,46 @@ class PDFLinkExtractor:
         try:
             result = urlparse(url)
             return all([result.scheme, result.netloc])
-        except:
+        except Exception:
+            # Not a bare except: it would swallow the parse deadline
             return False
     
-    def extract_all_links(self, pdf_content: bytes) -> Dict[str, Any]:
-        """Extract links using both methods and combine results"""
+    def extract_all_links(self, pdf_content: bytes, include_links_by_type: bool = False) -> Dict[str, Any]:
+        """Extract links using both methods and combine results.
+
+        pdfplumber only runs on pages where PyPDF2's text scored below the
+        quality threshold (or on every page if PyPDF2 could not read the file).
+        ``links_by_type`` repeats every link, so it is only built on request.
+        """
         all_links = []
         
         # Extract using PyPDF2
-        pypdf2_links = self.extract_links_with_pypdf2(pdf_content)
+        page_scores = {}
+        pypdf2_links = self.extract_links_with_pypdf2(pdf_content, page_scores)
         all_links.extend(pypdf2_links)
         
-        # Extract using pdfplumber
-        pdfplumber_links = self.extract_links_with_pdfplumber(pdf_content)
-        all_links.extend(pdfplumber_links)
+        # Extract using pdfplumber where PyPDF2's text was poor
+        if not page_scores:
+            fallback_pages = None
+        else:
+            fallback_pages = [
+                page_num for page_num, score in page_scores.items() if score < EXTRACTION_QUALITY_THRESHOLD
+            ]
+        if fallback_pages is None or fallback_pages:
+            pdfplumber_links = self.extract_links_with_pdfplumber(pdf_content, fallback_pages)
+            all_links.extend(pdfplumber_links)
         
         # Remove duplicates while preserving order
         unique_links = []
         seen = set()
         
         for link in all_links:
-            url = link.get("url", "")
+            url = link.url
             # Create a unique key based on URL and page
-            key = (url, link.get("page", 0))
+            key = (url, link.page)
             if key not in seen and url:
                 # Additional validation for HTTP/HTTPS URLs
-                if link["type"] in ["text_url", "hyperlink", "annotation"]:
+                if link.type in ["text_url", "hyperlink", "annotation"]:
                     if self.validate_url(url):
                         unique_links.append(link)
                         seen.add(key)
@@ -188,36 +667,666 @@ class PDFLinkExtractor:
                     unique_links.append(link)
                     seen.add(key)
         
-        # Group links by type
-        links_by_type = {}
+        # Count links by type
+        type_counts = {}
         for link in unique_links:
-            link_type = link["type"]
-            if link_type not in links_by_type:
-                links_by_type[link_type] = []
-            links_by_type[link_type].append(link)
+            type_counts[link.type] = type_counts.get(link.type, 0) + 1
         
-        return {
+        result = {
             "total_links": len(unique_links),
             "links": unique_links,
-            "links_by_type": links_by_type,
             "summary": {
-                "annotations": len(links_by_type.get("annotation", [])),
-                "hyperlinks": len(links_by_type.get("hyperlink", [])),
-                "text_urls": len(links_by_type.get("text_url", [])),
-                "emails": len(links_by_type.get("email", []))
+                "annotations": type_counts.get("annotation", 0),
+                "hyperlinks": type_counts.get("hyperlink", 0),
+                "text_urls": type_counts.get("text_url", 0),
+                "emails": type_counts.get("email", 0)
             }
         }
+        
+        if include_links_by_type:
+            links_by_type = {}
+            for link in unique_links:
+                links_by_type.setdefault(link.type, []).append(link)
+            result["links_by_type"] = links_by_type
+        
+        return result
 
 # Initialize the extractor
 extractor = PDFLinkExtractor()
 
+# Full-text index of parsed registry documents
+search_index = None
+if os.environ.get("SEARCH_INDEX_ENABLED", "true").lower() == "true":
+    search_index = BusinessSearchIndex(os.environ.get("SEARCH_INDEX_PATH", "data/registry_index.db"))
+
+# Shared queue for batches processed by worker.py processes
+work_queue = SQLiteWorkQueue(
+    os.environ.get("WORK_QUEUE_PATH", "data/work_queue.db"),
+    visibility_timeout=float(os.environ.get("WORK_QUEUE_VISIBILITY_TIMEOUT", 120)),
+    max_attempts=int(os.environ.get("WORK_QUEUE_MAX_ATTEMPTS", 3))
+)
+WORK_QUEUE_MAX_BATCH_URLS = int(os.environ.get("WORK_QUEUE_MAX_BATCH_URLS", 5000))
+
+def read_rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return read_peak_rss_mb()
+
+def read_peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (since start or the last reset)"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    # ru_maxrss is reported in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS counter so the next reading covers a single document"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+# Seconds the parent waits beyond twice the parse timeout before killing an unresponsive worker
+PARSE_WATCHDOG_GRACE = float(os.environ.get("PARSE_WATCHDOG_GRACE_SECONDS", 10))
+# Times a document is resubmitted after losing its worker to another document's watchdog kill
+PARSE_MAX_INTERRUPTIONS = 3
+
+def limit_worker_memory(max_memory_mb: float):
+    """Parse worker initializer: cap the address space so a runaway parse raises MemoryError"""
+    if max_memory_mb:
+        limit = int(max_memory_mb * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+class ParseDeadline(BaseException):
+    """Raised inside a parse worker when the document's time budget runs out.
+    
+    A BaseException so the broad ``except Exception`` blocks in the parsers don't swallow it.
+    """
+
+# Only set while a parse runs, so a timer firing just after the parse finished is ignored
+parse_deadline_armed = False
+
+def raise_parse_deadline(signum, frame):
+    if parse_deadline_armed:
+        raise ParseDeadline()
+
+class ParseBudgetExceeded(Exception):
+    """Raised when a document overruns its parse time or memory budget"""
+    
+    def __init__(self, kind: str, detail: str):
+        super().__init__(detail)
+        self.kind = kind
+        self.detail = detail
+
+class ParseInterrupted(Exception):
+    """Raised when a document keeps losing its worker to other documents' watchdog kills"""
+
+class ParseQuarantine:
+    """Content hashes of PDFs that blew their parse budget, so repeats fail fast.
+    
+    Entries are appended to a JSON-lines file and survive restarts.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: Optional[Dict[str, Dict[str, Any]]] = None
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        # Loaded lazily so parse workers importing the app never read it
+        if self.entries is None:
+            self.entries = {}
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as f:
+                    for line in f:
+                        if line.strip():
+                            entry = orjson.loads(line)
+                            self.entries[entry['sha256']] = entry
+        return self.entries
+    
+    def check(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self._load().get(content_hash)
+    
+    def add(self, content_hash: str, kind: str, detail: str):
+        entry = {'sha256': content_hash, 'kind': kind, 'detail': detail, 'quarantined_at': datetime.now().isoformat()}
+        with self.lock:
+            entries = self._load()
+            if content_hash in entries:
+                return
+            entries[content_hash] = entry
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write(orjson.dumps(entry) + b'\n')
+        logger.warning(f"Quarantined PDF {content_hash[:12]} ({kind}): {detail}")
+    
+    def describe(self) -> Dict[str, Any]:
+        with self.lock:
+            entries = self._load()
+            kinds = {}
+            for entry in entries.values():
+                kinds[entry['kind']] = kinds.get(entry['kind'], 0) + 1
+            return {'path': self.path, 'documents': len(entries), 'by_kind': kinds}
+
+parse_quarantine = ParseQuarantine(os.environ.get("PARSE_QUARANTINE_PATH", "data/parse_quarantine.jsonl"))
+
+class ParseWorkerPool:
+    """Process pool for CPU-bound PDF parsing.
+
+    PyPDF2/pdfminer object graphs from large documents keep worker RSS high, so
+    the pool is recycled after ``max_documents`` documents or once a worker
+    reports RSS above ``max_rss_mb``. Recycling swaps in a fresh executor for
+    new work and lets the old one drain its in-flight documents before exiting.
+    
+    Each document also has a budget: ``timeout`` seconds of wall-clock time,
+    enforced by a timer inside the worker, and ``max_memory_mb`` of address
+    space per worker. A parse stuck where the timer can't interrupt it (inside
+    C code) is caught by a watchdog in this process, which kills the
+    generation's processes since a running task can't be stopped any other way.
+    """
+
+    def __init__(self, max_workers: int, max_documents: int, max_rss_mb: float,
+                 timeout: float = 0, max_memory_mb: float = 0):
+        self.max_workers = max_workers
+        self.max_documents = max_documents
+        self.max_rss_mb = max_rss_mb
+        self.timeout = timeout
+        self.max_memory_mb = max_memory_mb
+        self.lock = threading.Lock()
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.generation = 0
+        self.documents_in_generation = 0
+        self.stats = {
+            'documents_parsed': 0,
+            'recycles': 0,
+            'last_recycle_reason': None,
+            'last_recycle_at': None,
+            'max_document_peak_mb': 0.0,
+            'timeouts': 0,
+            'memory_exceeded': 0,
+            'crashes': 0,
+            'killed_generations': 0,
+            'interrupted_documents': 0
+        }
+        self.worker_rss_mb: Dict[int, float] = {}
+        self.recent_documents = deque(maxlen=50)
+        self.slots: Optional[asyncio.Semaphore] = None
+        # Generations killed by the watchdog, so their other documents aren't blamed for it
+        self.killed_executors = weakref.WeakSet()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # Spawned workers start from a clean interpreter rather than a copy of the API process
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=limit_worker_memory,
+                initargs=(self.max_memory_mb,)
+            )
+            self.generation += 1
+            self.documents_in_generation = 0
+            self.worker_rss_mb = {}
+        return self.executor
+
+    def _submit(self, task: str, pdf_content: bytes, include_links_by_type: bool):
+        """Submit to the current generation, replacing it first if a worker death broke it"""
+        with self.lock:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(parse_worker_task, task, pdf_content, include_links_by_type, self.timeout)
+            except BrokenProcessPool:
+                self._discard(executor)
+                executor = self._get_executor()
+                future = executor.submit(parse_worker_task, task, pdf_content, include_links_by_type, self.timeout)
+            self.documents_in_generation += 1
+            return executor, future, self.generation
+
+    def _discard(self, executor: ProcessPoolExecutor) -> bool:
+        """Drop a broken executor (caller holds the lock); True if it was the current generation"""
+        if self.executor is not executor:
+            return False
+        self.executor = None
+        self.documents_in_generation = 0
+        if executor not in self.killed_executors:
+            self.stats['crashes'] += 1
+            self.stats['last_recycle_reason'] = "parse worker died"
+            self.stats['last_recycle_at'] = datetime.now().isoformat()
+            logger.warning(f"Parse worker died; replacing generation {self.generation}")
+        executor.shutdown(wait=False)
+        return True
+
+    async def run(self, task: str, pdf_content: bytes, include_links_by_type: bool = False) -> Dict[str, Any]:
+        """Run a parse task in a worker process and record its memory figures.
+        
+        Raises ParseBudgetExceeded if the document overruns its budget. A document
+        whose worker died is retried once on a fresh generation; one caught up in
+        another document's killed generation is retried without counting against
+        it, and raises ParseInterrupted (never a budget overrun) if that keeps
+        happening.
+        """
+        if self.slots is None:
+            # Created lazily so it binds to the running event loop
+            self.slots = asyncio.Semaphore(self.max_workers)
+        crashes = 0
+        interruptions = 0
+        # Holding a slot means a worker is free, so a submitted document starts
+        # straight away and the watchdog below only times the parse itself
+        async with self.slots:
+            while True:
+                executor, future, generation = self._submit(task, pdf_content, include_links_by_type)
+                # The watchdog allows for worker start-up on top of the in-worker timer
+                watchdog = self.timeout * 2 + PARSE_WATCHDOG_GRACE if self.timeout else None
+                try:
+                    result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), watchdog)
+                    break
+                except asyncio.TimeoutError:
+                    with self.lock:
+                        self.stats['timeouts'] += 1
+                    self.kill(executor, f"parse unresponsive after {watchdog:.0f}s")
+                    raise ParseBudgetExceeded('timeout', f"Parsing took longer than {watchdog:.0f}s and was killed")
+                except BrokenProcessPool:
+                    with self.lock:
+                        killed = executor in self.killed_executors
+                        self._discard(executor)
+                    if killed:
+                        with self.lock:
+                            self.stats['interrupted_documents'] += 1
+                        interruptions += 1
+                        if interruptions > PARSE_MAX_INTERRUPTIONS:
+                            raise ParseInterrupted("Parse workers were killed repeatedly while processing the document")
+                        continue
+                    crashes += 1
+                    if crashes > 1:
+                        raise ParseBudgetExceeded('crash', "Parse worker died twice while processing the document")
+        
+        if result.get('budget_exceeded'):
+            kind = result['budget_exceeded']
+            with self.lock:
+                self.stats['timeouts' if kind == 'timeout' else 'memory_exceeded'] += 1
+            # The worker unwound cleanly, so it stays in service
+            self.record(result.get('memory', {}), generation)
+            raise ParseBudgetExceeded(kind, result['detail'])
+        self.record(result.get('memory', {}), generation)
+        return result
+
+    def record(self, memory: Dict[str, Any], generation: int):
+        """Account for a finished document and recycle the workers if a limit was crossed"""
+        reason = None
+        with self.lock:
+            self.stats['documents_parsed'] += 1
+            self.recent_documents.append(memory)
+            self.stats['max_document_peak_mb'] = max(
+                self.stats['max_document_peak_mb'], memory.get('document_peak_mb', 0.0)
+            )
+            # Documents still draining from a retired generation don't count against the current one
+            if generation != self.generation or self.executor is None:
+                return
+            if memory.get('worker_pid'):
+                self.worker_rss_mb[memory['worker_pid']] = memory.get('rss_after_mb', 0.0)
+
+            if self.max_documents and self.documents_in_generation >= self.max_documents:
+                reason = f"document limit reached ({self.max_documents})"
+            elif self.max_rss_mb and memory.get('rss_after_mb', 0.0) > self.max_rss_mb:
+                reason = f"worker RSS {memory['rss_after_mb']:.0f}MB above {self.max_rss_mb:.0f}MB"
+        if reason:
+            self.recycle(reason)
+
+    def recycle(self, reason: str):
+        """Retire the current workers; queued and running documents still complete"""
+        with self.lock:
+            old_executor = self.executor
+            if old_executor is None:
+                return
+            self.executor = None
+            self.documents_in_generation = 0
+            self.stats['recycles'] += 1
+            self.stats['last_recycle_reason'] = reason
+            self.stats['last_recycle_at'] = datetime.now().isoformat()
+        logger.info(f"Recycling parse workers (generation {self.generation}): {reason}")
+        old_executor.shutdown(wait=False)
+
+    def kill(self, executor: ProcessPoolExecutor, reason: str):
+        """Kill an executor's worker processes outright; its other documents fail with BrokenProcessPool"""
+        with self.lock:
+            self.killed_executors.add(executor)
+            if self.executor is executor:
+                self.executor = None
+                self.documents_in_generation = 0
+            self.stats['killed_generations'] += 1
+            self.stats['last_recycle_reason'] = reason
+            self.stats['last_recycle_at'] = datetime.now().isoformat()
+        logger.warning(f"Killing parse workers: {reason}")
+        # ProcessPoolExecutor has no public API for stopping a running task
+        for process in list((executor._processes or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False)
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+                self.executor = None
+
+    def describe(self) -> Dict[str, Any]:
+        """Memory and recycling figures for the metrics endpoint"""
+        with self.lock:
+            recent = list(self.recent_documents)
+            return {
+                'max_workers': self.max_workers,
+                'max_documents_per_generation': self.max_documents,
+                'max_worker_rss_mb': self.max_rss_mb,
+                'parse_timeout_s': self.timeout,
+                'max_worker_memory_mb': self.max_memory_mb,
+                'generation': self.generation,
+                'documents_in_generation': self.documents_in_generation,
+                'worker_rss_mb': {str(pid): round(rss, 1) for pid, rss in self.worker_rss_mb.items()},
+                'recent_document_peak_mb': [round(m.get('document_peak_mb', 0.0), 1) for m in recent],
+                **self.stats
+            }
+
+class OverloadedError(Exception):
+    """Raised when admission control turns a batch away"""
+    
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+class ProcessingPipeline:
+    """Download (I/O) and parse (CPU) stages joined by a bounded queue.
+    
+    A document holds one of ``download_slots`` from the start of its download
+    until its bytes are accepted by the parse queue, so a full parse queue
+    stops new downloads instead of piling PDFs up in memory. Batches are
+    admitted only while the number of active batches and outstanding documents
+    stay under their limits.
+    """
+    
+    def __init__(self, parse_pool: ParseWorkerPool, download_slots: int, parse_queue_size: int,
+                 max_active_batches: int, max_pending_documents: int):
+        self.parse_pool = parse_pool
+        self.download_slot_count = download_slots
+        self.parse_queue_size = parse_queue_size
+        self.max_active_batches = max_active_batches
+        self.max_pending_documents = max_pending_documents
+        self.download_slots: Optional[asyncio.Semaphore] = None
+        self.parse_queue: Optional[asyncio.Queue] = None
+        self.consumers = []
+        self.active_batches = 0
+        self.pending_documents = 0
+        self.downloads_waiting = 0
+        self.downloads_active = 0
+        self.parses_active = 0
+        self.completions = deque(maxlen=1000)
+        self.stats = {'admitted_batches': 0, 'rejected_429': 0, 'rejected_503': 0}
+    
+    def _start(self):
+        # Created lazily so they bind to the server's running event loop
+        if self.parse_queue is None:
+            self.download_slots = asyncio.Semaphore(self.download_slot_count)
+            self.parse_queue = asyncio.Queue(maxsize=self.parse_queue_size)
+            self.consumers = [
+                asyncio.ensure_future(self._parse_consumer())
+                for _ in range(self.parse_pool.max_workers)
+            ]
+    
+    async def _parse_consumer(self):
+        """Feed queued documents to the parse workers, one at a time per worker"""
+        while True:
+            task, pdf_content, include_links_by_type, future = await self.parse_queue.get()
+            self.parses_active += 1
+            try:
+                if future.done():
+                    # Requester gave up while the document sat in the queue
+                    continue
+                result = await self.parse_pool.run(task, pdf_content, include_links_by_type)
+                # The requester may have been cancelled while the document was parsing
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.parses_active -= 1
+                self.parse_queue.task_done()
+    
+    def download_slot(self) -> "DownloadSlot":
+        self._start()
+        return DownloadSlot(self)
+    
+    async def enqueue_parse(self, task: str, pdf_content: bytes, include_links_by_type: bool = False) -> asyncio.Future:
+        """Hand a document to the parse stage; waits while the queue is full"""
+        self._start()
+        future = asyncio.get_event_loop().create_future()
+        await self.parse_queue.put((task, pdf_content, include_links_by_type, future))
+        return future
+    
+    def document_started(self):
+        self.pending_documents += 1
+    
+    def document_finished(self):
+        self.pending_documents -= 1
+        self.completions.append(time.monotonic())
+    
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, from the recent completion rate"""
+        now = time.monotonic()
+        recent = [t for t in self.completions if now - t <= 60]
+        if len(recent) < 2:
+            return 5
+        rate = len(recent) / max(now - recent[0], 1.0)
+        return int(max(1, min(120, self.pending_documents / rate)))
+    
+    def admit_batch(self):
+        """Admit a batch or raise OverloadedError (429 for too many batches, 503 for backlog)"""
+        if self.max_active_batches and self.active_batches >= self.max_active_batches:
+            self.stats['rejected_429'] += 1
+            raise OverloadedError(429, "Too many batches in progress, retry later", self.retry_after())
+        if self.max_pending_documents and self.pending_documents >= self.max_pending_documents:
+            self.stats['rejected_503'] += 1
+            raise OverloadedError(503, "Processing backlog is full, retry later", self.retry_after())
+        self.active_batches += 1
+        self.stats['admitted_batches'] += 1
+    
+    def finish_batch(self):
+        self.active_batches -= 1
+    
+    def describe(self) -> Dict[str, Any]:
+        """Queue depths and admission counters for the metrics endpoint"""
+        return {
+            'download_stage': {
+                'slots': self.download_slot_count,
+                'active': self.downloads_active,
+                'waiting': self.downloads_waiting
+            },
+            'parse_stage': {
+                'workers': self.parse_pool.max_workers,
+                'active': self.parses_active,
+                'queue_depth': self.parse_queue.qsize() if self.parse_queue else 0,
+                'queue_size': self.parse_queue_size
+            },
+            'admission': {
+                'active_batches': self.active_batches,
+                'max_active_batches': self.max_active_batches,
+                'pending_documents': self.pending_documents,
+                'max_pending_documents': self.max_pending_documents,
+                'retry_after': self.retry_after(),
+                **self.stats
+            }
+        }
+
+class DownloadSlot:
+    """Async context manager holding one download slot and keeping the stage counters"""
+    
+    def __init__(self, pipeline: ProcessingPipeline):
+        self.pipeline = pipeline
+    
+    async def __aenter__(self):
+        self.pipeline.downloads_waiting += 1
+        try:
+            await self.pipeline.download_slots.acquire()
+        finally:
+            self.pipeline.downloads_waiting -= 1
+        self.pipeline.downloads_active += 1
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.pipeline.downloads_active -= 1
+        self.pipeline.download_slots.release()
+
+class TransientDownloadError(Exception):
+    """Raised when a download failed in a way a later attempt may not (connection error, timeout, 5xx, 429)"""
+
+def is_transient_download_error(error: Exception) -> bool:
+    """Whether a requests exception is worth retrying later, rather than a final answer about the URL"""
+    if isinstance(error, requests.exceptions.HTTPError):
+        status_code = error.response.status_code if error.response is not None else 0
+        return status_code == 429 or status_code >= 500
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                              requests.exceptions.ChunkedEncodingError))
+
+class HostLatencyTracker:
+    """Recent download latencies per host, used for adaptive timeouts and hedging.
+    
+    Every download earns its host ``HEDGE_BUDGET_RATIO`` hedge tokens (up to
+    ``HEDGE_BUDGET_BURST``) and every hedge spends one, so duplicates stay a
+    small fraction of the load sent to any origin.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: Dict[str, deque] = {}
+        self.hedge_tokens: Dict[str, float] = {}
+    
+    def observe(self, host: str, seconds: float):
+        with self.lock:
+            self.samples.setdefault(host, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+            self.hedge_tokens[host] = min(
+                HEDGE_BUDGET_BURST, self.hedge_tokens.get(host, HEDGE_BUDGET_BURST) + HEDGE_BUDGET_RATIO
+            )
+    
+    def percentile(self, host: str, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the host's recent latencies, once there are enough samples"""
+        with self.lock:
+            samples = sorted(self.samples.get(host, ()))
+        if len(samples) < LATENCY_MIN_SAMPLES:
+            return None
+        return samples[max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples))) - 1))]
+    
+    def timeout_for(self, host: str) -> float:
+        p99 = self.percentile(host, 99)
+        if p99 is None:
+            return DOWNLOAD_TIMEOUT_DEFAULT
+        return max(DOWNLOAD_TIMEOUT_MIN, min(DOWNLOAD_TIMEOUT_MAX, p99 * DOWNLOAD_TIMEOUT_P99_MULTIPLIER))
+    
+    def try_hedge(self, host: str) -> bool:
+        """Spend a hedge token for the host if one is available"""
+        with self.lock:
+            tokens = self.hedge_tokens.get(host, HEDGE_BUDGET_BURST)
+            if tokens < 1:
+                return False
+            self.hedge_tokens[host] = tokens - 1
+            return True
+    
+    def describe(self) -> Dict[str, Any]:
+        with self.lock:
+            hosts = list(self.samples)
+        rounded = lambda value: round(value, 3) if value is not None else None
+        return {
+            host: {
+                'samples': len(self.samples[host]),
+                'p50_s': rounded(self.percentile(host, 50)),
+                'p95_s': rounded(self.percentile(host, 95)),
+                'p99_s': rounded(self.percentile(host, 99)),
+                'timeout_s': rounded(self.timeout_for(host)),
+                'hedge_tokens': round(self.hedge_tokens.get(host, HEDGE_BUDGET_BURST), 2)
+            }
+            for host in hosts
+        }
+
 class PDFDownloaderAndExtractor:
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
-        self.executor = ThreadPoolExecutor(max_workers=5)
+        # I/O stage (downloads and probes) and CPU stage (parsing) are sized separately
+        download_workers = int(os.environ.get("DOWNLOAD_WORKERS", 16))
+        # Extra threads so hedged duplicates don't queue behind the downloads they're hedging
+        self.executor = ThreadPoolExecutor(max_workers=download_workers + max(1, download_workers // 2))
+        self.parse_pool = ParseWorkerPool(
+            max_workers=int(os.environ.get("PARSE_WORKERS", os.cpu_count() or 2)),
+            max_documents=int(os.environ.get("PARSE_WORKER_MAX_DOCUMENTS", 200)),
+            max_rss_mb=float(os.environ.get("PARSE_WORKER_MAX_RSS_MB", 512)),
+            timeout=float(os.environ.get("PARSE_TIMEOUT_SECONDS", 60)),
+            max_memory_mb=float(os.environ.get("PARSE_WORKER_MAX_MEMORY_MB", 1024))
+        )
+        self.pipeline = ProcessingPipeline(
+            self.parse_pool,
+            download_slots=download_workers,
+            parse_queue_size=int(os.environ.get("PARSE_QUEUE_SIZE", 32)),
+            max_active_batches=int(os.environ.get("MAX_ACTIVE_BATCHES", 8)),
+            max_pending_documents=int(os.environ.get("MAX_PENDING_DOCUMENTS", 400))
+        )
+        
+        # Compiled URL classifier patterns
+        self.pdf_query_pattern = self._keyword_pattern([
+            'pdf', 'download', 'bulletin', 'extract', 'document', 'report',
+            'generate', 'attachment', 'file', 'export', 'print', 'doc'
+        ])
+        self.pdf_url_pattern = self._keyword_pattern([
+            'generatebulletin', 'bulletinextract', 'generatedocument',
+            'downloadreport', 'exportpdf', 'printreport', 'getdocument'
+        ])
+        self.gov_url_pattern = self._keyword_pattern([
+            '.gov.', '.org.', 'official', 'ministry', 'department',
+            'qkb.gov.al', 'umbraco/surface'
+        ])
+        self.gov_query_pattern = self._keyword_pattern(['code', 'id', 'simple', 'subject'])
+        self.skip_domain_pattern = self._keyword_pattern([
+            'facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com',
+            'youtube.com', 'google.com', 'wikipedia.org', 'amazon.com'
+        ])
+        self.potential_pdf_pattern = self._keyword_pattern([
+            '.pdf', 'pdf', 'download', 'document', 'report', 'bulletin',
+            'extract', 'generate', 'export', 'attachment', 'file'
+        ])
+        self.official_domain_pattern = self._keyword_pattern(['.gov', '.org', 'official', 'ministry'])
+        self.dynamic_query_pattern = self._keyword_pattern(['id=', 'code=', 'subject=', 'type='])
+        self.non_pdf_content_type_pattern = re.compile(r'(text/|image/|video/|audio/|application/(json|xml|xhtml|javascript))')
+        self.guid_pattern = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+        self.digits_pattern = re.compile(r'\d+')
+        
+        # Text extraction engines, fastest first
+        self.extraction_engines = [
+            EXTRACTION_ENGINES[name.strip()]
+            for name in os.environ.get("EXTRACTION_ENGINES", "pypdf2,pdfplumber").split(",")
+            if name.strip() in EXTRACTION_ENGINES
+        ]
+        
+        # Pre-download probing
+        self.probe_enabled = os.environ.get("PROBE_BEFORE_DOWNLOAD", "true").lower() == "true"
+        self.probe_timeout = float(os.environ.get("PROBE_TIMEOUT", 5))
+        self.probe_cache = OrderedDict()
+        self.probe_lock = threading.Lock()
+        self.probe_stats = {'probes': 0, 'cache_hits': 0, 'skipped_by_classifier': 0, 'skipped_by_probe': 0}
+        
+        # Per-host latency for adaptive timeouts and hedged downloads
+        self.host_latency = HostLatencyTracker()
+        self.hedge_enabled = HEDGE_DOWNLOADS
+        self.download_stats = {'downloads': 0, 'hedges_sent': 0, 'hedges_won': 0, 'hedges_denied': 0}
         
     def is_pdf_url(self, url: str) -> bool:
         """Check if URL likely points to a PDF"""
@@ -231,29 +1340,17 @@ class PDFDownloaderAndExtractor:
             return True
             
         # Check query parameters that suggest PDF download
-        pdf_keywords = [
-            'pdf', 'download', 'bulletin', 'extract', 'document', 'report', 
-            'generate', 'attachment', 'file', 'export', 'print', 'doc'
-        ]
-        if any(keyword in query for keyword in pdf_keywords):
+        if self.pdf_query_pattern.search(query):
             return True
         
         # Check for common PDF generation patterns in URLs
-        pdf_patterns = [
-            'generatebulletin', 'bulletinextract', 'generatedocument',
-            'downloadreport', 'exportpdf', 'printreport', 'getdocument'
-        ]
-        if any(pattern in url_lower for pattern in pdf_patterns):
+        if self.pdf_url_pattern.search(url_lower):
             return True
             
         # Check for government/official document patterns
-        gov_patterns = [
-            '.gov.', '.org.', 'official', 'ministry', 'department',
-            'qkb.gov.al', 'umbraco/surface'  # Specific to your example
-        ]
-        if any(pattern in url_lower for pattern in gov_patterns):
+        if self.gov_url_pattern.search(url_lower):
             # If it's a government site, be more liberal with PDF detection
-            if any(keyword in query for keyword in ['code', 'id', 'simple', 'subject']):
+            if self.gov_query_pattern.search(query):
                 return True
         
         return False
@@ -263,42 +1360,133 @@ class PDFDownloaderAndExtractor:
         if not url.startswith(('http://', 'https://')):
             return False
             
-        # Skip common non-PDF domains
-        skip_domains = [
-            'facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com',
-            'youtube.com', 'google.com', 'wikipedia.org', 'amazon.com'
-        ]
-        
         parsed = urlparse(url)
         domain = parsed.netloc.lower()
         
-        if any(skip_domain in domain for skip_domain in skip_domains):
+        # Skip common non-PDF domains
+        if self.skip_domain_pattern.search(domain):
             return False
         
-        # More liberal criteria for potential PDF URLs
-        url_lower = url.lower()
-        query = parsed.query.lower()
-        path = parsed.path.lower()
-        
         # Obvious PDF indicators
-        if any(indicator in url_lower for indicator in [
-            '.pdf', 'pdf', 'download', 'document', 'report', 'bulletin',
-            'extract', 'generate', 'export', 'attachment', 'file'
-        ]):
+        if self.potential_pdf_pattern.search(url.lower()):
             return True
             
         # Government or official sites are more likely to have documents
-        if any(pattern in domain for pattern in ['.gov', '.org', 'official', 'ministry']):
+        if self.official_domain_pattern.search(domain):
             return True
             
         # URLs with query parameters that suggest dynamic content generation
-        if query and any(param in query for param in ['id=', 'code=', 'subject=', 'type=']):
+        if self.dynamic_query_pattern.search(parsed.query.lower()):
             return True
             
         return False
     
-    def download_pdf(self, url: str, timeout: int = 30) -> Optional[bytes]:
-        """Download PDF from URL"""
+    def classify_url(self, url: str) -> str:
+        """Decide how to treat a link before spending a download slot on it.
+        
+        Returns 'download' for URLs that look like PDFs, 'probe' for ones that
+        might serve one (document-ish wording, official domains, dynamic
+        queries), and 'skip' for non-HTTP links, known non-PDF domains and
+        links neither check accepts.
+        """
+        if not url.startswith(('http://', 'https://')):
+            return 'skip'
+        if self.skip_domain_pattern.search(urlparse(url).netloc.lower()):
+            return 'skip'
+        if self.is_pdf_url(url):
+            return 'download'
+        if self.is_potential_pdf_url(url):
+            return 'probe'
+        return 'skip'
+    
+    def url_pattern_key(self, url: str) -> tuple:
+        """Host plus a normalised path/query shape, so probe results carry over to sibling URLs"""
+        parsed = urlparse(url)
+        path = self.guid_pattern.sub('{guid}', parsed.path.lower())
+        path = self.digits_pattern.sub('{n}', path)
+        query_keys = tuple(sorted({part.split('=', 1)[0].lower() for part in parsed.query.split('&') if part}))
+        return (parsed.netloc.lower(), path, query_keys)
+    
+    def probe_url(self, url: str) -> Optional[bool]:
+        """Cheaply check whether a URL serves a PDF.
+        
+        Tries a HEAD request first, then a ranged GET of the first bytes.
+        Returns None when neither gives a clear answer.
+        """
+        headers = {'Accept': 'application/pdf,*/*;q=0.8'}
+        try:
+            response = self.session.head(
+                url, timeout=self.probe_timeout, headers=headers, allow_redirects=True, verify=False
+            )
+            content_type = response.headers.get('content-type', '').lower()
+            if response.ok:
+                if 'application/pdf' in content_type:
+                    return True
+                if self.non_pdf_content_type_pattern.match(content_type):
+                    return False
+        except requests.exceptions.RequestException as e:
+            logger.info(f"HEAD probe failed for {url}: {str(e)}")
+        
+        # HEAD unsupported or inconclusive - peek at the first bytes instead
+        try:
+            response = self.session.get(
+                url, timeout=self.probe_timeout, stream=True, allow_redirects=True, verify=False,
+                headers={**headers, 'Range': f'bytes=0-{PROBE_RANGE_BYTES - 1}'}
+            )
+            try:
+                if not response.ok:
+                    return None
+                head = next(response.iter_content(chunk_size=PROBE_RANGE_BYTES), b'')
+            finally:
+                response.close()
+            if head.lstrip()[:4] == b'%PDF':
+                return True
+            if head.lstrip()[:1] in (b'<', b'{', b'['):
+                return False
+        except requests.exceptions.RequestException as e:
+            logger.info(f"Ranged probe failed for {url}: {str(e)}")
+        return None
+    
+    def should_download(self, url: str) -> bool:
+        """Probe a URL, reusing cached outcomes for the same host and URL pattern"""
+        key = self.url_pattern_key(url)
+        now = time.monotonic()
+        with self.probe_lock:
+            cached = self.probe_cache.get(key)
+            if cached and now - cached[1] < PROBE_CACHE_TTL:
+                self.probe_cache.move_to_end(key)
+                self.probe_stats['cache_hits'] += 1
+                return cached[0]
+        
+        outcome = self.probe_url(url)
+        with self.probe_lock:
+            self.probe_stats['probes'] += 1
+            if outcome is not None:
+                # Only definite answers are cached; unknowns are downloaded and judged by content
+                self.probe_cache[key] = (outcome, now)
+                self.probe_cache.move_to_end(key)
+                while len(self.probe_cache) > PROBE_CACHE_SIZE:
+                    self.probe_cache.popitem(last=False)
+        return outcome is not False
+    
+    @staticmethod
+    def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+        """Compile a list of substrings into one alternation"""
+        return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+    
+    def download_pdf(self, url: str, timeout: Optional[float] = None,
+                     cancel: Optional[threading.Event] = None) -> Optional[bytes]:
+        """Download PDF from URL.
+        
+        ``timeout`` defaults to one derived from the host's recent latency. Setting
+        ``cancel`` abandons the download at the next chunk (the other copy of a hedged pair won).
+        Returns None when the URL doesn't serve a PDF; raises TransientDownloadError
+        when the origin couldn't be reached or answered with a 5xx or 429.
+        """
+        host = urlparse(url).netloc.lower()
+        if timeout is None:
+            timeout = self.host_latency.timeout_for(host)
+        started = time.monotonic()
         try:
             # Enhanced headers to mimic a real browser more closely
             headers = {
@@ -333,7 +1521,17 @@ class PDFDownloaderAndExtractor:
             logger.info(f"Content-Length: {response.headers.get('content-length', 'Unknown')}")
             
             # Get full content
-            content = response.content
+            chunks = []
+            for chunk in response.iter_content(chunk_size=65536):
+                if cancel is not None and cancel.is_set():
+                    response.close()
+                    # Still a lower bound on this request's latency, so keep it in the tail
+                    self.host_latency.observe(host, time.monotonic() - started)
+                    logger.info(f"Abandoned download of {url}: hedged request finished first")
+                    return None
+                chunks.append(chunk)
+            content = b''.join(chunks)
+            self.host_latency.observe(host, time.monotonic() - started)
             logger.info(f"Downloaded {len(content)} bytes from {url}")
             
             # Check content type
@@ -380,17 +1578,31 @@ class PDFDownloaderAndExtractor:
                     return content
             except Exception as retry_e:
                 logging.error(f"Retry without SSL also failed: {str(retry_e)}")
+                if is_transient_download_error(retry_e):
+                    raise TransientDownloadError(str(retry_e)) from retry_e
             return None
             
         except requests.exceptions.RequestException as e:
             logging.error(f"Request error downloading PDF from {url}: {str(e)}")
+            # A read that timed out mid-body surfaces as a ConnectionError wrapping urllib3's timeout
+            if isinstance(e, requests.exceptions.Timeout) or any(isinstance(arg, ReadTimeoutError) for arg in e.args):
+                # Counted as at least the timeout it hit, so a host that slowed down earns a longer one
+                self.host_latency.observe(host, max(time.monotonic() - started, timeout))
+            if is_transient_download_error(e):
+                raise TransientDownloadError(str(e)) from e
             return None
         except Exception as e:
             logging.error(f"General error downloading PDF from {url}: {str(e)}")
             return None
     
     def extract_text_from_pdf(self, pdf_content: bytes) -> Dict[str, Any]:
-        """Extract text content from PDF"""
+        """Extract text content from PDF.
+        
+        The fastest engine reads every page; pages whose text scores below
+        EXTRACTION_QUALITY_THRESHOLD are re-extracted with the next engine and
+        the better text kept. A registry document that still scores low as a
+        whole gets the slower engine on all remaining pages.
+        """
         text_data = {
             'pages': [],
             'total_pages': 0,
@@ -398,72 +1610,80 @@ class PDFDownloaderAndExtractor:
             'metadata': {}
         }
         
-        try:
-            # Try with PyPDF2 first
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
-            text_data['total_pages'] = len(pdf_reader.pages)
-            
-            # Extract metadata
-            if pdf_reader.metadata:
-                text_data['metadata'] = {
-                    'title': pdf_reader.metadata.get('/Title', ''),
-                    'author': pdf_reader.metadata.get('/Author', ''),
-                    'subject': pdf_reader.metadata.get('/Subject', ''),
-                    'creator': pdf_reader.metadata.get('/Creator', ''),
-                    'producer': pdf_reader.metadata.get('/Producer', ''),
-                    'creation_date': str(pdf_reader.metadata.get('/CreationDate', '')),
-                    'modification_date': str(pdf_reader.metadata.get('/ModDate', ''))
-                }
-            
-            # Extract text from each page
-            for page_num, page in enumerate(pdf_reader.pages, 1):
-                try:
-                    page_text = page.extract_text()
-                    text_data['pages'].append({
-                        'page_number': page_num,
-                        'text': page_text,
-                        'text_length': len(page_text) if page_text else 0
-                    })
-                    text_data['total_text_length'] += len(page_text) if page_text else 0
-                except Exception as e:
-                    logging.warning(f"Error extracting text from page {page_num}: {str(e)}")
-                    text_data['pages'].append({
-                        'page_number': page_num,
-                        'text': '',
-                        'text_length': 0,
-                        'error': str(e)
-                    })
-            
-        except Exception as e:
-            logging.error(f"Error with PyPDF2 text extraction: {str(e)}")
-            
-            # Fallback to pdfplumber
+        pages: Dict[int, Dict[str, Any]] = {}
+        tried: Dict[int, set] = {}
+        usage = {'pages': {}, 'fallback_pages': 0, 'fallback_document': False}
+        
+        def merge(engine_name: str, extracted: Dict[str, Any]):
+            if not text_data['total_pages']:
+                text_data['total_pages'] = extracted['total_pages']
+            if not text_data['metadata'] and extracted.get('metadata'):
+                text_data['metadata'] = extracted['metadata']
+            for page_num, page in extracted['pages'].items():
+                tried.setdefault(page_num, set()).add(engine_name)
+                score = score_text_quality(page['text'])
+                current = pages.get(page_num)
+                if current is None or score > current['quality']:
+                    pages[page_num] = {**page, 'engine': engine_name, 'quality': score}
+        
+        last_error = None
+        for position, engine in enumerate(self.extraction_engines):
+            if position == 0:
+                page_numbers = None
+            elif not pages:
+                # Earlier engines could not open the file at all
+                page_numbers = None
+            else:
+                page_numbers = [
+                    page_num for page_num, page in pages.items()
+                    if page['quality'] < EXTRACTION_QUALITY_THRESHOLD
+                ]
+                if not page_numbers:
+                    break
+                usage['fallback_pages'] += len(page_numbers)
             try:
-                with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
-                    text_data['total_pages'] = len(pdf.pages)
-                    
-                    for page_num, page in enumerate(pdf.pages, 1):
-                        try:
-                            page_text = page.extract_text() or ''
-                            text_data['pages'].append({
-                                'page_number': page_num,
-                                'text': page_text,
-                                'text_length': len(page_text)
-                            })
-                            text_data['total_text_length'] += len(page_text)
-                        except Exception as e:
-                            logging.warning(f"Error extracting text from page {page_num} with pdfplumber: {str(e)}")
-                            text_data['pages'].append({
-                                'page_number': page_num,
-                                'text': '',
-                                'text_length': 0,
-                                'error': str(e)
-                            })
-                            
+                merge(engine.name, engine.extract(pdf_content, page_numbers))
+            except MemoryError:
+                raise
             except Exception as e:
-                logging.error(f"Error with pdfplumber text extraction: {str(e)}")
-                text_data['error'] = str(e)
+                logging.error(f"Error with {engine.name} text extraction: {str(e)}")
+                last_error = e
+        
+        # Whole-document check: a registry extract missing most of its fields gets the slower engines everywhere
+        combined = ' '.join(page['text'] for page in pages.values())
+        if pages and score_text_quality(combined) < EXTRACTION_QUALITY_THRESHOLD:
+            if sum(1 for indicator in REGISTRY_INDICATORS if indicator in combined) >= 2:
+                for engine in self.extraction_engines[1:]:
+                    remaining = [page_num for page_num in pages if engine.name not in tried.get(page_num, set())]
+                    if not remaining:
+                        continue
+                    usage['fallback_document'] = True
+                    try:
+                        merge(engine.name, engine.extract(pdf_content, remaining))
+                    except MemoryError:
+                        raise
+                    except Exception as e:
+                        logging.error(f"Error with {engine.name} text extraction: {str(e)}")
+        
+        if not pages and last_error is not None:
+            text_data['error'] = str(last_error)
         
+        for page_num in sorted(pages):
+            page = pages[page_num]
+            page_entry = {
+                'page_number': page_num,
+                'text': page['text'],
+                'text_length': len(page['text']),
+                'engine': page['engine'],
+                'quality': page['quality']
+            }
+            if page.get('error'):
+                page_entry['error'] = page['error']
+            text_data['pages'].append(page_entry)
+            text_data['total_text_length'] += len(page['text'])
+            usage['pages'][page['engine']] = usage['pages'].get(page['engine'], 0) + 1
+        
+        text_data['engines'] = usage
         return text_data
     
     def clean_phone_number(self, phone: str) -> str:
@@ -507,22 +1727,8 @@ class PDFDownloaderAndExtractor:
         }
         
         # Check if this is an Albanian business registry document
-        registry_indicators = [
-            'EKSTRAKT I REGJISTRIT TREGTAR',
-            'SUBJEKTIT "PERSON FIZIK"',
-            'GJENDJA E REGJISTRIMIT',
-            'Numri unik i identifikimit të subjektit',
-            'NUIS',
-            'Emri i subjektit',
-            'Forma ligjore',
-            'Data e regjistrimit',
-            'Fusha e veprimtarisë',
-            'Vendi i ushtrimit të aktivitetit',
-            'Statusi'
-        ]
-        
         # If we find any Albanian business registry indicators, mark as Albanian registry
-        found_indicators = sum(1 for indicator in registry_indicators if indicator in text)
+        found_indicators = sum(1 for indicator in REGISTRY_INDICATORS if indicator in text)
         if found_indicators >= 3:  # Need at least 3 indicators to be confident
             registry_data['is_albanian_registry'] = True
             
@@ -607,23 +1813,56 @@ class PDFDownloaderAndExtractor:
                     registry_data['business_details']['business_name'] = name
             
             # Add field labels in both Albanian and English
-            registry_data['field_labels'] = {
-                'nuis': {'sq': 'NUIS', 'en': 'Unique Business Identification Number'},
-                'business_name': {'sq': 'Emri i subjektit', 'en': 'Business Name'},
-                'legal_form': {'sq': 'Forma ligjore', 'en': 'Legal Form'},
-                'registration_date': {'sq': 'Data e regjistrimit', 'en': 'Registration Date'},
-                'activity_field': {'sq': 'Fusha e veprimtarisë', 'en': 'Field of Activity'},
-                'business_address': {'sq': 'Vendi i ushtrimit të aktivitetit', 'en': 'Business Address'},
-                'email': {'sq': 'E-Mail', 'en': 'Email'},
-                'phone': {'sq': 'Telefon', 'en': 'Phone'},
-                'status': {'sq': 'Statusi', 'en': 'Status'},
-                'date_generated': {'sq': 'Datë', 'en': 'Document Date'}
-            }
+            registry_data['field_labels'] = REGISTRY_FIELD_TRANSLATIONS
         
         return registry_data
 
-    def analyze_pdf_content(self, text_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze extracted text content"""
+    def parse_registry_records(self, text: str, spans: List[Tuple[int, int]], offset: int = 0) -> List[Dict[str, Any]]:
+        """Parse each record span of ``text`` (which starts at ``offset`` in the document)"""
+        records = []
+        for start, end in spans:
+            registry = self.parse_albanian_business_registry(text[start - offset:end - offset])
+            if registry['is_albanian_registry'] and registry['business_details']:
+                records.append({'business_details': registry['business_details'], 'span': [start, end]})
+        return records
+    
+    def attach_registry_records(self, analysis: Dict[str, Any], records: List[Dict[str, Any]]):
+        """Store parsed records; the first also fills the single-business fields older clients read"""
+        if not records:
+            return
+        analysis['content_analysis']['albanian_business_registry'] = {
+            'is_albanian_registry': True,
+            'business_details': records[0]['business_details'],
+            'field_labels': REGISTRY_FIELD_TRANSLATIONS,
+            'record_count': len(records)
+        }
+        analysis['content_analysis']['registry_records'] = records
+    
+    async def parse_registry_records_parallel(self, text: str, spans: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """Fan chunks of record spans out across the parse workers and merge them in order"""
+        chunk_size = max(
+            REGISTRY_PARALLEL_CHUNK_RECORDS,
+            -(-len(spans) // max(self.parse_pool.max_workers, 1))
+        )
+        futures = []
+        for i in range(0, len(spans), chunk_size):
+            chunk = spans[i:i + chunk_size]
+            chunk_start, chunk_end = chunk[0][0], chunk[-1][1]
+            futures.append(await self.pipeline.enqueue_parse(
+                'records', (text[chunk_start:chunk_end], chunk_start, chunk)
+            ))
+        records = []
+        for parsed in await asyncio.gather(*futures):
+            records.extend(parsed['records'])
+        return records
+    
+    def analyze_pdf_content(self, text_data: Dict[str, Any], defer_records_over: int = 0) -> Dict[str, Any]:
+        """Analyze extracted text content.
+        
+        A document holding several registry extracts gets one parsed record per
+        extract. With ``defer_records_over`` set, bundles larger than that are
+        left as ``registry_records_pending`` spans for the caller to parse in parallel.
+        """
         analysis = {
             'summary': {
                 'total_pages': text_data.get('total_pages', 0),
@@ -662,10 +1901,16 @@ class PDFDownloaderAndExtractor:
             amounts = amount_pattern.findall(all_text)
             analysis['content_analysis']['numerical_values'] = list(set(amounts))[:20]  # Limit to first 20
             
-            # Parse Albanian Business Registry if detected
-            albanian_registry = self.parse_albanian_business_registry(all_text)
-            if albanian_registry['is_albanian_registry']:
-                analysis['content_analysis']['albanian_business_registry'] = albanian_registry
+            # Parse Albanian Business Registry if detected, one record per extract
+            spans = split_registry_records(all_text)
+            if len(spans) == 1:
+                albanian_registry = self.parse_albanian_business_registry(all_text)
+                if albanian_registry['is_albanian_registry']:
+                    analysis['content_analysis']['albanian_business_registry'] = albanian_registry
+            elif defer_records_over and len(spans) > defer_records_over:
+                analysis['content_analysis']['registry_records_pending'] = spans
+            else:
+                self.attach_registry_records(analysis, self.parse_registry_records(all_text, spans))
             
             # Basic language detection (very simple)
             if all_text:
@@ -673,6 +1918,64 @@ class PDFDownloaderAndExtractor:
         
         return analysis
     
+    def process_pdf_content(self, pdf_content: bytes, defer_records_over: int = 0) -> Dict[str, Any]:
+        """Extract links, text and analysis from downloaded PDF bytes"""
+        links_data = extractor.extract_all_links(pdf_content)
+        text_data = self.extract_text_from_pdf(pdf_content)
+        analysis = self.analyze_pdf_content(text_data, defer_records_over)
+        return {
+            'links': links_data,
+            'content': analysis,
+            'raw_text': text_data
+        }
+    
+    async def download_hedged(self, url: str) -> Optional[bytes]:
+        """Download a URL, sending a duplicate request if the first outlives the host's p95.
+        
+        Whichever copy returns a PDF first wins and the other is abandoned.
+        Hedges are limited per host by the hedge budget. Raises
+        TransientDownloadError only if no copy got an answer from the origin.
+        """
+        loop = asyncio.get_event_loop()
+        host = urlparse(url).netloc.lower()
+        self.download_stats['downloads'] += 1
+        primary_cancel = threading.Event()
+        primary = loop.run_in_executor(self.executor, self.download_pdf, url, None, primary_cancel)
+        
+        hedge_delay = self.host_latency.percentile(host, 95) if self.hedge_enabled else None
+        if hedge_delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        if done:
+            return primary.result()
+        if not self.host_latency.try_hedge(host):
+            self.download_stats['hedges_denied'] += 1
+            return await primary
+        
+        self.download_stats['hedges_sent'] += 1
+        hedge_cancel = threading.Event()
+        hedge = loop.run_in_executor(self.executor, self.download_pdf, url, None, hedge_cancel)
+        cancels = {primary: primary_cancel, hedge: hedge_cancel}
+        pending = {primary, hedge}
+        content = None
+        failures = []
+        while pending and content is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    failures.append(future.exception())
+                elif content is None and future.result():
+                    content = future.result()
+                    if future is hedge:
+                        self.download_stats['hedges_won'] += 1
+        # Abandon the slower copy; it stops at its next chunk
+        for future in pending:
+            cancels[future].set()
+            future.add_done_callback(lambda f: f.exception())
+        if content is None and len(failures) == 2:
+            raise failures[0]
+        return content
+    
     async def process_url_liberal(self, url: str) -> Dict[str, Any]:
         """Download and process a URL with liberal PDF detection - for processing all links"""
         result = {
@@ -682,50 +1985,271 @@ class PDFDownloaderAndExtractor:
             'data': {}
         }
         
+        self.pipeline.document_started()
         try:
-            # Always try to download, regardless of URL pattern
-            logger.info(f"Attempting to download from: {url}")
-            
-            # Download content
-            pdf_content = await asyncio.get_event_loop().run_in_executor(
-                self.executor, self.download_pdf, url
-            )
-            
-            if not pdf_content:
+            # Classify the link before spending a download slot and a parse on it
+            decision = self.classify_url(url)
+            if decision == 'skip':
+                self.probe_stats['skipped_by_classifier'] += 1
                 result['status'] = 'skipped'
-                result['reason'] = 'No content downloaded or content is not a PDF'
+                result['reason'] = 'URL classified as non-PDF'
                 return result
             
-            result['data']['file_size'] = len(pdf_content)
-            logger.info(f"Downloaded {len(pdf_content)} bytes from {url}")
-            
-            # Extract links from downloaded PDF
-            links_data = extractor.extract_all_links(pdf_content)
-            result['data']['links'] = links_data
-            
-            # Extract text content
-            text_data = await asyncio.get_event_loop().run_in_executor(
-                self.executor, self.extract_text_from_pdf, pdf_content
-            )
+            # The download slot is held until the parse queue accepts the document
+            async with self.pipeline.download_slot():
+                if decision == 'probe' and self.probe_enabled:
+                    should_download = await asyncio.get_event_loop().run_in_executor(
+                        self.executor, self.should_download, url
+                    )
+                    if not should_download:
+                        self.probe_stats['skipped_by_probe'] += 1
+                        result['status'] = 'skipped'
+                        result['reason'] = 'Probe found no PDF at URL'
+                        return result
+                
+                logger.info(f"Attempting to download from: {url}")
+                
+                # Download content, hedged against slow responses
+                try:
+                    pdf_content = await self.download_hedged(url)
+                except TransientDownloadError as e:
+                    result['status'] = 'error'
+                    result['reason'] = f"Download failed: {e}"
+                    # The origin may recover, so a later attempt can succeed
+                    result['retryable'] = True
+                    return result
+                
+                if not pdf_content:
+                    result['status'] = 'skipped'
+                    result['reason'] = 'No content downloaded or content is not a PDF'
+                    return result
+                
+                result['data']['file_size'] = len(pdf_content)
+                logger.info(f"Downloaded {len(pdf_content)} bytes from {url}")
+                
+                # PDFs that blew their parse budget before fail fast
+                content_hash = hashlib.sha256(pdf_content).hexdigest()
+                quarantined = parse_quarantine.check(content_hash)
+                if quarantined:
+                    result['status'] = 'timeout'
+                    result['reason'] = f"Quarantined: {quarantined['detail']}"
+                    return result
+                
+                parse_future = await self.pipeline.enqueue_parse('document', pdf_content)
             
-            # Analyze content
-            analysis = self.analyze_pdf_content(text_data)
-            result['data']['content'] = analysis
-            result['data']['raw_text'] = text_data  # Include raw text data
+            # Extract links, text and analysis in a parse worker process
+            parsed = await parse_future
+            document_text = ' '.join(page.get('text') or '' for page in parsed['raw_text'].get('pages', []))
+            pending_records = parsed['content']['content_analysis'].pop('registry_records_pending', None)
+            if pending_records:
+                records = await self.parse_registry_records_parallel(document_text, pending_records)
+                self.attach_registry_records(parsed['content'], records)
+            result['data']['links'] = parsed['links']
+            result['data']['content'] = parsed['content']
+            result['data']['raw_text'] = parsed['raw_text']  # Include raw text data
+            result['data']['memory'] = parsed['memory']
+            engine_stats.record(parsed['raw_text'].get('engines'))
             
             result['status'] = 'success'
             logger.info(f"Successfully processed PDF from: {url}")
             
+            # Keep registry documents searchable after this response is gone
+            businesses = BusinessRow.rows_from_result(result)
+            if businesses and search_index is not None:
+                records = parsed['content']['content_analysis'].get('registry_records')
+                entries = [
+                    (asdict(business), document_text[slice(*record['span'])] if records else document_text)
+                    for business, record in zip(businesses, records or [None])
+                ]
+                try:
+                    await asyncio.get_event_loop().run_in_executor(None, search_index.add_many, entries)
+                except Exception as e:
+                    # The document was processed fine; a busy or broken index shouldn't fail it
+                    logger.error(f"Error indexing businesses from {url}: {str(e)}")
+            
+        except ParseBudgetExceeded as e:
+            parse_quarantine.add(content_hash, e.kind, e.detail)
+            result['status'] = 'timeout'
+            result['reason'] = e.detail
+        except ParseInterrupted as e:
+            result['status'] = 'error'
+            result['reason'] = str(e)
+            result['retryable'] = True
         except Exception as e:
             result['status'] = 'error'
             result['reason'] = str(e)
             logging.error(f"Error processing URL {url}: {str(e)}")
+        finally:
+            self.pipeline.document_finished()
         
         return result
 
 # Initialize the downloader
 pdf_downloader = PDFDownloaderAndExtractor()
 
+def parse_worker_task(task: str, payload: Any, include_links_by_type: bool = False,
+                      timeout: float = 0, defer_records_over: int = REGISTRY_PARALLEL_MIN_RECORDS) -> Dict[str, Any]:
+    """Entry point for parse worker processes; reports per-document memory with the result.
+    
+    ``payload`` is the PDF bytes, or for ``records`` a (text, offset, spans) chunk of a bundle.
+    Running out of ``timeout`` seconds or worker memory returns ``budget_exceeded`` instead.
+    Bundles with more than ``defer_records_over`` records are left for parallel parsing (0 parses them here).
+    """
+    global parse_deadline_armed
+    reset_peak_rss()
+    rss_before = read_rss_mb()
+    
+    if timeout:
+        signal.signal(signal.SIGALRM, raise_parse_deadline)
+    try:
+        if timeout:
+            parse_deadline_armed = True
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        if task == 'links':
+            result = {'links': extractor.extract_all_links(payload, include_links_by_type)}
+        elif task == 'records':
+            text, offset, spans = payload
+            result = {'records': pdf_downloader.parse_registry_records(text, spans, offset)}
+        else:
+            result = pdf_downloader.process_pdf_content(payload, defer_records_over)
+        parse_deadline_armed = False
+    except ParseDeadline:
+        result = {'budget_exceeded': 'timeout', 'detail': f"Parsing took longer than {timeout:g}s"}
+    except MemoryError:
+        limit = resource.getrlimit(resource.RLIMIT_AS)[0]
+        result = {
+            'budget_exceeded': 'memory',
+            'detail': f"Parsing needed more than {limit / (1024 * 1024):.0f}MB of memory"
+        }
+    finally:
+        parse_deadline_armed = False
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    
+    rss_after = read_rss_mb()
+    result['memory'] = {
+        'worker_pid': os.getpid(),
+        'document_size': len(payload[0] if task == 'records' else payload),
+        'rss_before_mb': rss_before,
+        'rss_after_mb': rss_after,
+        'document_peak_mb': max(read_peak_rss_mb(), rss_after)
+    }
+    return result
+
+class PDFCrawler:
+    """Follows links found inside downloaded PDFs as a crawl frontier.
+    
+    The frontier is a priority queue that puts likely registry extracts first,
+    URLs are visited once by canonical form, and the crawl stops at
+    ``max_depth`` link hops or ``max_pages`` fetched documents.
+    """
+    
+    def __init__(self, downloader: "PDFDownloaderAndExtractor", max_depth: int, max_pages: int, concurrency: int):
+        self.downloader = downloader
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.registry_url_pattern = re.compile(r'generatebulletinextract|bulletinextract|qkb\.gov\.al', re.IGNORECASE)
+    
+    @staticmethod
+    def canonicalize_url(url: str) -> str:
+        """Normalise a URL so trivially different spellings are visited once"""
+        parsed = urlparse(url.strip())
+        scheme = parsed.scheme.lower()
+        netloc = parsed.netloc.lower()
+        if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+            netloc = netloc.rsplit(':', 1)[0]
+        query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+        return urlunparse((scheme, netloc, parsed.path or '/', '', query, ''))
+    
+    def priority(self, url: str) -> int:
+        """Lower values are fetched first: registry extracts, then other likely PDFs, then the rest"""
+        if self.registry_url_pattern.search(url):
+            return 0
+        if self.downloader.is_pdf_url(url):
+            return 1
+        return 2
+    
+    async def crawl(self, seed_urls: List[str]) -> Dict[str, Any]:
+        """Crawl from the seed URLs and collect business rows from every registry document reached"""
+        frontier = []
+        visited = set()
+        sequence = 0
+        
+        def enqueue(url: str, depth: int):
+            nonlocal sequence
+            canonical = self.canonicalize_url(url)
+            if canonical in visited:
+                return
+            visited.add(canonical)
+            heapq.heappush(frontier, (self.priority(url), depth, sequence, url))
+            sequence += 1
+        
+        for url in seed_urls:
+            enqueue(url, 0)
+        
+        businesses = {}
+        status_counts = {}
+        retryable = 0
+        pages_fetched = 0
+        max_depth_reached = 0
+        in_flight = {}
+        
+        while frontier or in_flight:
+            # Keep up to ``concurrency`` documents in flight, highest priority first
+            while frontier and len(in_flight) < self.concurrency and pages_fetched < self.max_pages:
+                _, depth, _, url = heapq.heappop(frontier)
+                task = asyncio.ensure_future(self.downloader.process_url_liberal(url))
+                in_flight[task] = depth
+                pages_fetched += 1
+                max_depth_reached = max(max_depth_reached, depth)
+            
+            if not in_flight:
+                break
+            
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                depth = in_flight.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    logger.error(f"Crawl task failed: {str(e)}")
+                    status_counts['error'] = status_counts.get('error', 0) + 1
+                    retryable += 1
+                    continue
+                
+                status_counts[result['status']] = status_counts.get(result['status'], 0) + 1
+                retryable += 1 if result.get('retryable') else 0
+                for business in BusinessRow.rows_from_result(result):
+                    key = business.nuis or business.source_url
+                    businesses.setdefault(key, business)
+                
+                # Links inside the downloaded PDF become the next frontier level
+                if result['status'] == 'success' and depth < self.max_depth:
+                    for link in result['data'].get('links', {}).get('links', []):
+                        if link.url.startswith(('http://', 'https://')):
+                            enqueue(link.url, depth + 1)
+        
+        return {
+            'businesses': list(businesses.values()),
+            'stats': {
+                'pages_fetched': pages_fetched,
+                'urls_discovered': len(visited),
+                'frontier_remaining': len(frontier),
+                'max_depth_reached': max_depth_reached,
+                'statuses': status_counts,
+                'retryable': retryable
+            }
+        }
+
+@app.on_event("shutdown")
+def shutdown_parse_workers():
+    """Stop parse worker processes with the server"""
+    pdf_downloader.parse_pool.shutdown()
+    if search_index is not None:
+        search_index.close()
+    work_queue.close()
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Serve the main HTML page"""
@@ -735,9 +2259,33 @@ async def root():
     except FileNotFoundError:
         return {"message": "Albanian Business Registry Extractor", "version": "1.0.0", "note": "Web interface not found"}
 
-@app.post("/extract-and-process-table")
-async def extract_and_process_table(file: UploadFile = File(...)):
-    """Extract links from uploaded PDF and process all Albanian business registries into a table format"""
+def admit_batch():
+    """Apply admission control, turning overload into 429/503 responses with Retry-After"""
+    try:
+        pdf_downloader.pipeline.admit_batch()
+    except OverloadedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+
+async def parse_upload_links(pdf_content: bytes, include_links_by_type: bool = False,
+                             content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Extract links from an uploaded PDF in a parse worker, turning budget overruns into 422s"""
+    content_hash = content_hash or hashlib.sha256(pdf_content).hexdigest()
+    quarantined = parse_quarantine.check(content_hash)
+    if quarantined:
+        raise HTTPException(status_code=422, detail=f"PDF is quarantined: {quarantined['detail']}")
+    try:
+        # Through the parse queue, so uploads share the workers fairly with batch documents
+        parse_future = await pdf_downloader.pipeline.enqueue_parse('links', pdf_content, include_links_by_type)
+        return (await parse_future)['links']
+    except ParseBudgetExceeded as e:
+        parse_quarantine.add(content_hash, e.kind, e.detail)
+        raise HTTPException(status_code=422, detail=f"PDF could not be parsed: {e.detail}")
+    except ParseInterrupted as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+@app.post("/extract-links")
+async def extract_links(request: Request, file: UploadFile = File(...), include_links_by_type: bool = False):
+    """Extract links from an uploaded PDF"""
     
     # Validate file type
     if not file.filename or not file.filename.lower().endswith('.pdf'):
@@ -745,22 +2293,91 @@ async def extract_and_process_table(file: UploadFile = File(...)):
     
     try:
         pdf_content = await file.read()
-        links_result = extractor.extract_all_links(pdf_content)
+        content_hash = hashlib.sha256(pdf_content).hexdigest()
+        etag = compute_etag('links', content_hash, {
+            'filename': file.filename,
+            'include_links_by_type': include_links_by_type
+        })
+        cached = cached_response(request, etag)
+        if cached is not None:
+            return cached
+        
+        links_result = await parse_upload_links(pdf_content, include_links_by_type, content_hash)
+        return cacheable_response(request, etag, {
+            "filename": file.filename,
+            "data": links_result,
+            "timestamp": datetime.now().isoformat()
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error extracting links: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+
+@app.post("/extract-and-process-table")
+async def extract_and_process_table(request: Request, file: UploadFile = File(...), crawl: bool = False,
+                                    max_depth: int = 2, max_pages: int = 200):
+    """Extract links from uploaded PDF and process all Albanian business registries into a table format.
+    
+    With ``crawl=true`` links inside downloaded PDFs are followed too, up to
+    ``max_depth`` hops and ``max_pages`` documents.
+    """
+    
+    # Validate file type
+    if not file.filename or not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+    
+    crawl_options = {
+        'max_depth': max(0, min(max_depth, CRAWL_MAX_DEPTH)),
+        'max_pages': max(1, min(max_pages, CRAWL_MAX_PAGES))
+    }
+    
+    # Repeat uploads are answered from the ETag cache without running the pipeline
+    pdf_content = await file.read()
+    content_hash = hashlib.sha256(pdf_content).hexdigest()
+    etag = compute_etag('table', content_hash, {
+        'filename': file.filename,
+        'crawl': crawl,
+        **(crawl_options if crawl else {})
+    }, fresh=True)
+    cached = cached_response(request, etag)
+    if cached is not None:
+        return cached
+    
+    admit_batch()
+    try:
+        links_result = await parse_upload_links(pdf_content, content_hash=content_hash)
         
         # Get all HTTP/HTTPS URLs
         all_urls = []
         for link in links_result.get('links', []):
-            url = link.get('url', '')
+            url = link.url
             if url and url.startswith(('http://', 'https://')):
                 all_urls.append(url)
         
         if not all_urls:
-            return JSONResponse(content={
+            return cacheable_response(request, etag, {
                 "status": "no_http_links",
                 "message": "No HTTP/HTTPS links found in the uploaded file",
                 "businesses": []
             })
         
+        if crawl:
+            crawler = PDFCrawler(pdf_downloader, concurrency=CRAWL_CONCURRENCY, **crawl_options)
+            crawl_result = await crawler.crawl(all_urls)
+            # Responses with transient failures aren't cached, so a retry can do better
+            return cacheable_response(request, etag, {
+                "status": "completed",
+                "original_file": file.filename,
+                "total_links_found": len(all_urls),
+                "total_processed": crawl_result['stats']['pages_fetched'],
+                "businesses_found": len(crawl_result['businesses']),
+                "businesses": crawl_result['businesses'],
+                "crawl": crawl_result['stats'],
+                "timestamp": datetime.now().isoformat()
+            }, cacheable=not crawl_result['stats']['retryable'])
+        
         # Limit to first 50 URLs to prevent server overload
         urls_to_process = all_urls[:50]
         
@@ -770,32 +2387,16 @@ async def extract_and_process_table(file: UploadFile = File(...)):
         
         # Process results and extract business data
         businesses = []
-        for i, result in enumerate(results):
+        transient_errors = False
+        for result in results:
+            if isinstance(result, Exception) or result.get('retryable'):
+                transient_errors = True
             if isinstance(result, Exception):
                 continue
             
-            if isinstance(result, dict) and result.get('status') == 'success' and result.get('data', {}).get('content', {}).get('content_analysis', {}).get('albanian_business_registry'):
-                registry = result['data']['content']['content_analysis']['albanian_business_registry']
-                if registry.get('is_albanian_registry') and registry.get('business_details'):
-                    business = {
-                        'source_url': result['url'],
-                        'nuis': registry['business_details'].get('nuis', ''),
-                        'business_name': registry['business_details'].get('business_name', ''),
-                        'legal_form': registry['business_details'].get('legal_form', ''),
-                        'registration_date': registry['business_details'].get('registration_date', ''),
-                        'activity_field': registry['business_details'].get('activity_field', ''),
-                        'business_address': registry['business_details'].get('business_address', ''),
-                        'email': registry['business_details'].get('email', ''),
-                        'phone': registry['business_details'].get('phone', ''),
-                        'status': registry['business_details'].get('status', ''),
-                        'date_generated': registry['business_details'].get('date_generated', ''),
-                        'file_size': result['data'].get('file_size', 0),
-                        'pages': result['data']['content']['summary'].get('total_pages', 0),
-                        'processed_at': result.get('timestamp', '')
-                    }
-                    businesses.append(business)
-        
-        return JSONResponse(content={
+            businesses.extend(BusinessRow.rows_from_result(result))
+        
+        return cacheable_response(request, etag, {
             "status": "completed",
             "original_file": file.filename,
             "total_links_found": len(all_urls),
@@ -803,17 +2404,184 @@ async def extract_and_process_table(file: UploadFile = File(...)):
             "businesses_found": len(businesses),
             "businesses": businesses,
             "timestamp": datetime.now().isoformat()
-        })
+        }, cacheable=not transient_errors)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in extract and process table: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+    finally:
+        pdf_downloader.pipeline.finish_batch()
+
+@app.post("/batches")
+async def create_batch(request: Request, file: UploadFile = File(...)):
+    """Queue every link of an uploaded PDF for the queue workers; poll ``/batches/{batch_id}`` for results"""
+    
+    # Validate file type
+    if not file.filename or not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+    
+    try:
+        pdf_content = await file.read()
+        links_result = await parse_upload_links(pdf_content)
+        
+        # Unique HTTP/HTTPS URLs in document order
+        urls = list(dict.fromkeys(
+            link.url for link in links_result.get('links', [])
+            if link.url and link.url.startswith(('http://', 'https://'))
+        ))[:WORK_QUEUE_MAX_BATCH_URLS]
+        
+        if not urls:
+            return json_response(request, {
+                "status": "no_http_links",
+                "message": "No HTTP/HTTPS links found in the uploaded file"
+            })
+        
+        batch_id = await asyncio.get_event_loop().run_in_executor(None, work_queue.create_batch, urls, file.filename)
+        return json_response(request, {
+            "status": "queued",
+            "batch_id": batch_id,
+            "original_file": file.filename,
+            "total_queued": len(urls),
+            "status_url": f"/batches/{batch_id}",
+            "timestamp": datetime.now().isoformat()
+        }, status_code=202)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+
+@app.get("/batches/{batch_id}")
+async def get_batch(request: Request, batch_id: str, include_results: bool = False):
+    """Progress of a queued batch and the businesses its finished tasks found so far"""
+    loop = asyncio.get_event_loop()
+    status = await loop.run_in_executor(None, work_queue.batch_status, batch_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    results = await loop.run_in_executor(None, work_queue.batch_results, batch_id)
+    businesses = {}
+    result_counts = {}
+    for result in results:
+        result_counts[result['status']] = result_counts.get(result['status'], 0) + 1
+        for business in result.get('businesses', []):
+            businesses.setdefault(business.get('nuis') or business.get('source_url'), business)
+    
+    response = {
+        **status,
+        "status": "completed" if status['complete'] else "processing",
+        "results": result_counts,
+        "businesses_found": len(businesses),
+        "businesses": list(businesses.values()),
+        "timestamp": datetime.now().isoformat()
+    }
+    if include_results:
+        response["task_results"] = results
+    return json_response(request, response)
+
+@app.get("/search")
+async def search_businesses(request: Request, q: Optional[str] = None, activity: Optional[str] = None,
+                            address: Optional[str] = None, nuis: Optional[str] = None,
+                            legal_form: Optional[str] = None, status: Optional[str] = None,
+                            registered_from: Optional[str] = None, registered_to: Optional[str] = None,
+                            limit: int = 50, offset: int = 0):
+    """Search businesses indexed from previously processed registry documents"""
+    if search_index is None:
+        raise HTTPException(status_code=503, detail="Search index is disabled")
+    
+    try:
+        results = await asyncio.get_event_loop().run_in_executor(
+            None,
+            lambda: search_index.search(
+                q=q, activity=activity, address=address, nuis=nuis, legal_form=legal_form, status=status,
+                registered_from=registered_from, registered_to=registered_to,
+                limit=max(1, min(limit, 500)), offset=max(0, offset)
+            )
+        )
+        return json_response(request, results)
+        
+    except Exception as e:
+        logger.error(f"Error searching index: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error searching index: {str(e)}")
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "albanian-business-registry-extractor"}
 
+@app.get("/metrics/downloads")
+async def download_metrics():
+    """Pre-download probe and classifier counters, hedging counters and per-host latency"""
+    return {
+        "probe_enabled": pdf_downloader.probe_enabled,
+        "probe_cache_entries": len(pdf_downloader.probe_cache),
+        **pdf_downloader.probe_stats,
+        "hedge_enabled": pdf_downloader.hedge_enabled,
+        **pdf_downloader.download_stats,
+        "hosts": pdf_downloader.host_latency.describe(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/metrics/pipeline")
+async def pipeline_metrics():
+    """Download/parse stage activity, parse queue depth and admission counters"""
+    return {
+        **pdf_downloader.pipeline.describe(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/metrics/queue")
+async def queue_metrics():
+    """Work queue depth by task status, expired leases and workers holding leases"""
+    return {
+        **(await asyncio.get_event_loop().run_in_executor(None, work_queue.stats)),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/metrics/search")
+async def search_metrics():
+    """Businesses in the search index and when it was last written to"""
+    if search_index is None:
+        return {"enabled": False, "timestamp": datetime.now().isoformat()}
+    return {
+        "enabled": True,
+        **(await asyncio.get_event_loop().run_in_executor(None, search_index.stats)),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/metrics/cache")
+async def cache_metrics():
+    """ETag response cache size, hits and 304s"""
+    return {
+        **response_cache.describe(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/metrics/engines")
+async def engine_metrics():
+    """Pages accepted per extraction engine and how often the slower engine was needed"""
+    return {
+        **engine_stats.describe(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/metrics/memory")
+async def memory_metrics():
+    """Memory figures for the API process and the parse workers"""
+    return {
+        "api_process": {
+            "pid": os.getpid(),
+            "rss_mb": round(read_rss_mb(), 1),
+            "peak_rss_mb": round(read_peak_rss_mb(), 1)
+        },
+        "parse_workers": pdf_downloader.parse_pool.describe(),
+        "quarantine": parse_quarantine.describe(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
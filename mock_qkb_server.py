@@ -0,0 +1,424 @@
+"""Local stand-in for the QKB (qkb.gov.al) registry origin.
+
+Serves generated business registry extracts at GenerateBulletinExtract-style
+URLs, plus index PDFs that link to them, so the extractor can be load-tested
+without touching the real government site.
+
+Run with:
+
+    python mock_qkb_server.py --port 8100 --latency lognormal:150:0.6 --error-rate 0.02
+"""
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse, JSONResponse
+from typing import List, Dict, Any, Optional, Tuple
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXTRACT_PATH = "/umbraco/Surface/SearchSurface/GenerateBulletinExtract"
+
+FIRST_NAMES = ["ARBEN", "BLERINA", "DRITAN", "ELONA", "GENTI", "ILIR", "JONIDA", "KLEA", "LORENC", "MIRELA"]
+LAST_NAMES = ["HOXHA", "SHEHU", "KOLA", "DOKA", "BASHA", "MUCA", "LLESHI", "GJONI", "PRIFTI", "ZENELI"]
+COMPANY_WORDS = ["ALBA", "ILIRIA", "DRINI", "TOMORRI", "ADRIATIK", "VLORA", "KORABI", "BUNA", "DAJTI", "ARTA"]
+COMPANY_SUFFIXES = ["TRADE", "CONSTRUCTION", "GROUP", "SERVICE", "TECH", "FOOD", "TRAVEL", "LOGISTICS"]
+LEGAL_FORMS = ["Shoqëri me Përgjegjësi të Kufizuar", "Person Fizik", "Shoqëri Aksionare", "Shoqëri Kolektive"]
+ACTIVITIES = [
+    "Tregti me shumicë dhe pakicë e produkteve ushqimore.",
+    "Ndërtim i ndërtesave të banimit dhe jo-banimit.",
+    "Shërbime konsulence në fushën e teknologjisë së informacionit.",
+    "Transport mallrash në rrugë automobilistike.",
+    "Veprimtari e restoranteve dhe shërbimeve të ushqimit.",
+    "Agjenci udhëtimi dhe operator turistik.",
+]
+CITIES = ["Tiranë", "Durrës", "Vlorë", "Shkodër", "Elbasan", "Korçë", "Fier", "Berat"]
+STREETS = ["Rruga Myslym Shyri", "Bulevardi Zogu I", "Rruga e Durrësit", "Rruga Kavajës", "Rruga Sami Frashëri"]
+STATUSES = ["Aktiv", "Aktiv", "Aktiv", "Pezulluar", "Çregjistruar"]
+NOISE_LINKS = [
+    "https://www.facebook.com/qkb.gov.al",
+    "https://twitter.com/qkb_al",
+    "https://www.youtube.com/watch?v=registry",
+    "https://www.linkedin.com/company/qkb",
+]
+
+
+def _pdf_escape(text: str) -> bytes:
+    """Encode a line of text as a PDF literal string body (WinAnsi)"""
+    raw = text.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def build_pdf(pages: List[List[str]], links: Optional[List[Tuple[int, int, str]]] = None,
+              font_size: int = 9) -> bytes:
+    """Build a minimal text PDF.
+
+    ``pages`` is a list of pages, each a list of text lines. ``links`` is a
+    list of ``(page_index, line_index, uri)`` tuples; each becomes a /Link
+    annotation covering that line.
+    """
+    links = links or []
+    leading = font_size + 3
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog_id = add(b"")  # Placeholder, filled in once the page tree exists
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    page_ids = []
+    for page_index, lines in enumerate(pages):
+        stream = [b"BT", b"/F1 %d Tf" % font_size, b"%d TL" % leading, b"40 800 Td"]
+        for line in lines:
+            stream.append(b"(" + _pdf_escape(line) + b") Tj T*")
+        stream.append(b"ET")
+        content = b"\n".join(stream)
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+        annot_ids = []
+        for link_page, line_index, uri in links:
+            if link_page != page_index:
+                continue
+            y = 800 - line_index * leading
+            annot_ids.append(add(
+                b"<< /Type /Annot /Subtype /Link /Rect [40 %d 560 %d] /Border [0 0 0] "
+                b"/A << /S /URI /URI (%s) >> >>" % (y - 2, y + font_size, _pdf_escape(uri))
+            ))
+
+        annots = b""
+        if annot_ids:
+            annots = b" /Annots [" + b" ".join(b"%d 0 R" % i for i in annot_ids) + b"]"
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R%s >>"
+            % (pages_id, font_id, content_id, annots)
+        ))
+
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+    return bytes(out)
+
+
+def generate_business(subject_code: str) -> Dict[str, str]:
+    """Deterministically generate registry details for a subject code"""
+    rng = random.Random(subject_code)
+    legal_form = rng.choice(LEGAL_FORMS)
+    if legal_form == "Person Fizik":
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    else:
+        name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+    return {
+        "nuis": f"{rng.choice('JKLM')}{rng.randint(10000000, 99999999)}{rng.choice('ABCDEFGHIJKLMNOPRSTUVWXYZ')}",
+        "business_name": name,
+        "legal_form": legal_form,
+        "registration_date": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1995, 2025)}",
+        "activity_field": rng.choice(ACTIVITIES),
+        "business_address": f"{rng.choice(CITIES)}, {rng.choice(STREETS)}, Nr. {rng.randint(1, 250)}, Kati {rng.randint(1, 9)}",
+        "email": f"info@{name.split()[0].lower()}{rng.randint(1, 999)}.al",
+        "phone": f"+355 6{rng.randint(7, 9)}{rng.randint(1000000, 9999999)}",
+        "status": rng.choice(STATUSES),
+    }
+
+
+def registry_extract_lines(business: Dict[str, str], date_generated: str) -> List[str]:
+    """Lay out a registry extract the way QKB bulletin extracts read"""
+    return [
+        "REPUBLIKA E SHQIPËRISË",
+        "QENDRA KOMBËTARE E BIZNESIT",
+        "EKSTRAKT I REGJISTRIT TREGTAR",
+        f"Datë: {date_generated}",
+        "",
+        f"Numri unik i identifikimit të subjektit (NUIS) {business['nuis']}",
+        f"Emri i subjektit {business['business_name']}",
+        f"Forma ligjore {business['legal_form']}",
+        f"Data e regjistrimit {business['registration_date']}",
+        f"Fusha e veprimtarisë {business['activity_field']}",
+        f"Vendi i ushtrimit të aktivitetit {business['business_address']}",
+        f"E-Mail: {business['email']}",
+        f"Telefon: {business['phone']}",
+        f"Statusi {business['status']}",
+        "",
+        "GJENDJA E REGJISTRIMIT",
+        "Ky ekstrakt është gjeneruar në mënyrë elektronike.",
+    ]
+
+
+def build_registry_extract(subject_code: str, date_generated: Optional[str] = None) -> bytes:
+    """Generate a one-page registry extract PDF for a subject code"""
+    date_generated = date_generated or time.strftime("%d/%m/%Y")
+    return build_pdf([registry_extract_lines(generate_business(subject_code), date_generated)])
+
+
+def build_registry_bundle(count: int, seed: int = 0, date_generated: Optional[str] = None) -> bytes:
+    """Generate an exported bundle of ``count`` registry extracts, one per page"""
+    date_generated = date_generated or time.strftime("%d/%m/%Y")
+    return build_pdf([
+        registry_extract_lines(generate_business(code), date_generated) for code in subject_codes(count, seed)
+    ])
+
+
+def subject_codes(count: int, seed: int = 0) -> List[str]:
+    """Deterministic list of subjectDefCode GUIDs"""
+    rng = random.Random(seed)
+    return [str(uuid.UUID(int=rng.getrandbits(128), version=4)).upper() for _ in range(count)]
+
+
+def build_index_pdf(base_url: str, count: int, seed: int = 0, noise: int = 0, links_per_page: int = 50) -> bytes:
+    """Generate an index PDF whose links point at ``count`` extracts on ``base_url``"""
+    urls = [
+        f"{base_url.rstrip('/')}{EXTRACT_PATH}?subjectDefCode={code}&isSimple=true"
+        for code in subject_codes(count, seed)
+    ]
+    rng = random.Random(seed)
+    for _ in range(noise):
+        urls.insert(rng.randint(0, len(urls)), rng.choice(NOISE_LINKS))
+
+    pages: List[List[str]] = []
+    links: List[Tuple[int, int, str]] = []
+    for start in range(0, max(len(urls), 1), links_per_page):
+        page_urls = urls[start:start + links_per_page]
+        lines = [f"Lista e subjekteve - faqja {len(pages) + 1}"]
+        for url in page_urls:
+            links.append((len(pages), len(lines), url))
+            lines.append(url)
+        pages.append(lines)
+    return build_pdf(pages, links, font_size=6)
+
+
+class LatencyModel:
+    """Parses and samples latency specs such as ``fixed:200``, ``uniform:50:400``
+    or ``lognormal:150:0.6`` (median ms, sigma)"""
+
+    def __init__(self, spec: str = "none"):
+        self.spec = spec
+        parts = spec.split(":")
+        self.kind = parts[0]
+        self.params = [float(p) for p in parts[1:]]
+        if self.kind not in ("none", "fixed", "uniform", "lognormal", "exponential"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        """Return a latency in seconds"""
+        if self.kind == "fixed":
+            ms = self.params[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(self.params[0], self.params[1])
+        elif self.kind == "lognormal":
+            median, sigma = self.params[0], self.params[1] if len(self.params) > 1 else 0.5
+            ms = rng.lognormvariate(0, sigma) * median
+        elif self.kind == "exponential":
+            ms = rng.expovariate(1.0 / self.params[0])
+        else:
+            ms = 0.0
+        return ms / 1000.0
+
+
+class MockBehavior:
+    """Runtime-tunable failure and latency behaviour of the mock origin"""
+
+    def __init__(self, latency: str = "none", error_rate: float = 0.0, rate_limit: float = 0.0,
+                 max_concurrency: int = 0, drip_rate: float = 0.0, drip_fraction: float = 0.0,
+                 seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self.configure(latency=latency, error_rate=error_rate, rate_limit=rate_limit,
+                       max_concurrency=max_concurrency, drip_rate=drip_rate, drip_fraction=drip_fraction)
+        self.in_flight = 0
+        self.stats = {"requests": 0, "errors": 0, "throttled": 0, "dripped": 0, "served": 0, "bytes": 0}
+
+    def configure(self, **options: Any):
+        """Update behaviour; unspecified options keep their current value"""
+        if "latency" in options:
+            self.latency = LatencyModel(options["latency"])
+        if "error_rate" in options:
+            self.error_rate = float(options["error_rate"])
+        if "rate_limit" in options:
+            # Token bucket: rate_limit requests/second, burst of one second
+            self.rate_limit = float(options["rate_limit"])
+            self.tokens = self.rate_limit
+            self.last_refill = time.monotonic()
+        if "max_concurrency" in options:
+            self.max_concurrency = int(options["max_concurrency"])
+        if "drip_rate" in options:
+            self.drip_rate = float(options["drip_rate"])
+        if "drip_fraction" in options:
+            self.drip_fraction = float(options["drip_fraction"])
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency.spec,
+            "error_rate": self.error_rate,
+            "rate_limit": self.rate_limit,
+            "max_concurrency": self.max_concurrency,
+            "drip_rate": self.drip_rate,
+            "drip_fraction": self.drip_fraction,
+        }
+
+    def throttled(self) -> bool:
+        """Check the concurrency cap and token bucket"""
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            return True
+        if self.rate_limit > 0:
+            now = time.monotonic()
+            self.tokens = min(self.rate_limit, self.tokens + (now - self.last_refill) * self.rate_limit)
+            self.last_refill = now
+            if self.tokens < 1:
+                return True
+            self.tokens -= 1
+        return False
+
+
+behavior = MockBehavior(
+    latency=os.environ.get("MOCK_LATENCY", "none"),
+    error_rate=float(os.environ.get("MOCK_ERROR_RATE", 0)),
+    rate_limit=float(os.environ.get("MOCK_RATE_LIMIT", 0)),
+    max_concurrency=int(os.environ.get("MOCK_MAX_CONCURRENCY", 0)),
+    drip_rate=float(os.environ.get("MOCK_DRIP_RATE", 0)),
+    drip_fraction=float(os.environ.get("MOCK_DRIP_FRACTION", 0)),
+)
+
+mock_app = FastAPI(title="QKB Mock Origin", version="1.0.0")
+
+
+async def _drip(body: bytes, rate: float, chunk_size: int = 1024):
+    """Yield ``body`` at roughly ``rate`` bytes per second"""
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+        await asyncio.sleep(chunk_size / rate)
+
+
+async def _serve(body: bytes, media_type: str, filename: str) -> Response:
+    """Apply the configured latency, errors, throttling and drip to a response"""
+    behavior.stats["requests"] += 1
+    if behavior.throttled():
+        behavior.stats["throttled"] += 1
+        return Response(status_code=429, headers={"Retry-After": "1"}, content=b"Too Many Requests")
+
+    behavior.in_flight += 1
+    try:
+        await asyncio.sleep(behavior.latency.sample(behavior.rng))
+        if behavior.rng.random() < behavior.error_rate:
+            behavior.stats["errors"] += 1
+            return Response(status_code=500, content=b"<html><body>Server Error</body></html>", media_type="text/html")
+
+        behavior.stats["served"] += 1
+        behavior.stats["bytes"] += len(body)
+        headers = {"Content-Disposition": f'inline; filename="{filename}"', "Content-Length": str(len(body))}
+        if behavior.drip_rate > 0 and behavior.rng.random() < behavior.drip_fraction:
+            behavior.stats["dripped"] += 1
+            return StreamingResponse(_drip(body, behavior.drip_rate), media_type=media_type, headers=headers)
+        return Response(content=body, media_type=media_type, headers=headers)
+    finally:
+        behavior.in_flight -= 1
+
+
+@mock_app.get(EXTRACT_PATH)
+async def generate_bulletin_extract(subjectDefCode: str, isSimple: bool = True):
+    """Serve a generated registry extract for a subject code"""
+    body = build_registry_extract(subjectDefCode)
+    return await _serve(body, "application/pdf", f"{subjectDefCode}.pdf")
+
+
+@mock_app.get("/index.pdf")
+async def index_pdf(request: Request, count: int = 20, seed: int = 0, noise: int = 0):
+    """Serve an index PDF linking to ``count`` extracts on this server"""
+    base_url = str(request.base_url)
+    body = build_index_pdf(base_url, count, seed=seed, noise=noise)
+    return Response(content=body, media_type="application/pdf")
+
+
+@mock_app.get("/bundle.pdf")
+async def bundle_pdf(count: int = 50, seed: int = 0):
+    """Serve one PDF bundling ``count`` registry extracts"""
+    body = build_registry_bundle(count, seed=seed)
+    return await _serve(body, "application/pdf", "bundle.pdf")
+
+
+@mock_app.get("/directory.pdf")
+async def directory_pdf(request: Request, count: int = 100, parts: int = 5):
+    """Serve a PDF linking to ``parts`` index PDFs that together cover ``count`` extracts"""
+    base_url = str(request.base_url).rstrip('/')
+    per_part = max(1, count // max(parts, 1))
+    links = [(0, i + 1, f"{base_url}/index.pdf?count={per_part}&seed={i}") for i in range(parts)]
+    lines = ["Drejtoria e listave"] + [uri for _, _, uri in links]
+    body = build_pdf([lines], links, font_size=6)
+    return await _serve(body, "application/pdf", "directory.pdf")
+
+
+@mock_app.get("/_config")
+async def get_config():
+    """Current behaviour settings"""
+    return behavior.describe()
+
+
+@mock_app.post("/_config")
+async def update_config(options: Dict[str, Any]):
+    """Change behaviour at runtime, e.g. {"latency": "uniform:100:900", "error_rate": 0.05}"""
+    try:
+        behavior.configure(**options)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
+    return behavior.describe()
+
+
+@mock_app.get("/_stats")
+async def get_stats():
+    """Request counters since startup"""
+    return {**behavior.stats, "in_flight": behavior.in_flight}
+
+
+@mock_app.get("/health")
+async def health_check():
+    return {"status": "healthy", "service": "qkb-mock-origin"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local QKB stand-in origin")
+    parser.add_argument("--host", default=os.environ.get("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("MOCK_PORT", 8100)))
+    parser.add_argument("--latency", default=behavior.latency.spec,
+                        help="none | fixed:MS | uniform:LO:HI | lognormal:MEDIAN:SIGMA | exponential:MEAN")
+    parser.add_argument("--error-rate", type=float, default=behavior.error_rate, help="Fraction of 500 responses")
+    parser.add_argument("--rate-limit", type=float, default=behavior.rate_limit, help="Requests/second before 429 (0 = off)")
+    parser.add_argument("--max-concurrency", type=int, default=behavior.max_concurrency, help="Concurrent requests before 429 (0 = off)")
+    parser.add_argument("--drip-rate", type=float, default=behavior.drip_rate, help="Bytes/second for slow-drip bodies")
+    parser.add_argument("--drip-fraction", type=float, default=behavior.drip_fraction, help="Fraction of responses to drip")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    behavior.rng = random.Random(args.seed)
+    behavior.configure(latency=args.latency, error_rate=args.error_rate, rate_limit=args.rate_limit,
+                       max_concurrency=args.max_concurrency, drip_rate=args.drip_rate,
+                       drip_fraction=args.drip_fraction)
+    logger.info(f"Mock QKB origin behaviour: {behavior.describe()}")
+
+    import uvicorn
+    uvicorn.run(mock_app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
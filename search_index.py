@@ -0,0 +1,231 @@
+"""Embedded full-text index over parsed business registry documents.
+
+Rows are upserted by NUIS as registry extracts are parsed, and queried with
+field filters plus ranked FTS5 text search over activity and address.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+FIELDS = [
+    'nuis', 'business_name', 'legal_form', 'registration_date', 'activity_field',
+    'business_address', 'email', 'phone', 'status', 'date_generated', 'source_url'
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS businesses (
+    id INTEGER PRIMARY KEY,
+    record_key TEXT NOT NULL UNIQUE,
+    nuis TEXT,
+    business_name TEXT,
+    legal_form TEXT,
+    registration_date TEXT,
+    registration_date_iso TEXT,
+    activity_field TEXT,
+    business_address TEXT,
+    email TEXT,
+    phone TEXT,
+    status TEXT,
+    date_generated TEXT,
+    source_url TEXT,
+    document_text TEXT,
+    indexed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_businesses_nuis ON businesses(nuis);
+CREATE INDEX IF NOT EXISTS idx_businesses_legal_form ON businesses(legal_form COLLATE NOCASE, registration_date_iso);
+CREATE INDEX IF NOT EXISTS idx_businesses_status ON businesses(status COLLATE NOCASE, registration_date_iso);
+CREATE INDEX IF NOT EXISTS idx_businesses_registration_date ON businesses(registration_date_iso);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS businesses_fts USING fts5(
+    activity_field, business_address, business_name, document_text,
+    content='businesses', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS businesses_ai AFTER INSERT ON businesses BEGIN
+    INSERT INTO businesses_fts(rowid, activity_field, business_address, business_name, document_text)
+    VALUES (new.id, new.activity_field, new.business_address, new.business_name, new.document_text);
+END;
+CREATE TRIGGER IF NOT EXISTS businesses_ad AFTER DELETE ON businesses BEGIN
+    INSERT INTO businesses_fts(businesses_fts, rowid, activity_field, business_address, business_name, document_text)
+    VALUES ('delete', old.id, old.activity_field, old.business_address, old.business_name, old.document_text);
+END;
+CREATE TRIGGER IF NOT EXISTS businesses_au AFTER UPDATE ON businesses BEGIN
+    INSERT INTO businesses_fts(businesses_fts, rowid, activity_field, business_address, business_name, document_text)
+    VALUES ('delete', old.id, old.activity_field, old.business_address, old.business_name, old.document_text);
+    INSERT INTO businesses_fts(rowid, activity_field, business_address, business_name, document_text)
+    VALUES (new.id, new.activity_field, new.business_address, new.business_name, new.document_text);
+END;
+"""
+
+# bm25 column weights: activity, address, name, full document text
+RANK_WEIGHTS = (4.0, 3.0, 2.0, 0.5)
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def to_iso_date(value: Optional[str]) -> Optional[str]:
+    """Convert dd/mm/yyyy (registry format) or yyyy-mm-dd to yyyy-mm-dd"""
+    if not value:
+        return None
+    for date_format in ('%d/%m/%Y', '%Y-%m-%d', '%d.%m.%Y'):
+        try:
+            return datetime.strptime(value.strip(), date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def fts_query(text: str, column: Optional[str] = None) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: every word must match, as a prefix"""
+    tokens = TOKEN_PATTERN.findall(text or '')
+    if not tokens:
+        return None
+    query = ' '.join(f'"{token}"*' for token in tokens)
+    if column:
+        return f'{column} : ({query})'
+    return query
+
+
+class BusinessSearchIndex:
+    """SQLite FTS5 index of businesses, filled incrementally as documents are parsed"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection: Optional[sqlite3.Connection] = None
+        self.last_updated: Optional[str] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so processes that import the app but never index (parse workers) skip it
+        if self.connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # The API, queue workers and batch runs all write this file; wait out each other's transactions
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self.connection = connection
+        return self.connection
+
+    def add_many(self, entries: List[Tuple[Dict[str, Any], str]]) -> None:
+        """Insert or update ``(business, document_text)`` pairs in one transaction.
+
+        Businesses are keyed by NUIS, or by source URL when there is none.
+        """
+        indexed_at = datetime.now().isoformat()
+        rows = []
+        for business, document_text in entries:
+            record_key = business.get('nuis') or business.get('source_url')
+            if not record_key:
+                continue
+            values = {field: business.get(field, '') for field in FIELDS}
+            values['record_key'] = record_key
+            values['registration_date_iso'] = to_iso_date(business.get('registration_date'))
+            values['document_text'] = document_text
+            values['indexed_at'] = indexed_at
+            rows.append(values)
+        if not rows:
+            return
+
+        columns = list(rows[0])
+        updates = ', '.join(f'{column} = excluded.{column}' for column in columns if column != 'record_key')
+        sql = (
+            f"INSERT INTO businesses ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT(record_key) DO UPDATE SET {updates}"
+        )
+        with self.lock:
+            connection = self._connect()
+            try:
+                connection.executemany(sql, [[values[column] for column in columns] for values in rows])
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            self.last_updated = indexed_at
+
+    def search(self, q: Optional[str] = None, activity: Optional[str] = None, address: Optional[str] = None,
+               nuis: Optional[str] = None, legal_form: Optional[str] = None, status: Optional[str] = None,
+               registered_from: Optional[str] = None, registered_to: Optional[str] = None,
+               limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """Filter and rank businesses.
+
+        ``q`` searches every text column; ``activity`` and ``address`` only
+        their own column. Results are ranked by bm25 when any text is given,
+        otherwise ordered by registration date.
+        """
+        started = time.perf_counter()
+        match_parts = [part for part in (
+            fts_query(q),
+            fts_query(activity, 'activity_field'),
+            fts_query(address, 'business_address'),
+        ) if part]
+
+        where = []
+        params: List[Any] = []
+        if match_parts:
+            where.append('businesses_fts MATCH ?')
+            params.append(' AND '.join(f'({part})' for part in match_parts))
+        if nuis:
+            where.append('b.nuis = ?')
+            params.append(nuis.strip().upper())
+        if legal_form:
+            where.append('b.legal_form = ? COLLATE NOCASE')
+            params.append(legal_form.strip())
+        if status:
+            where.append('b.status = ? COLLATE NOCASE')
+            params.append(status.strip())
+        date_from = to_iso_date(registered_from)
+        if date_from:
+            where.append('b.registration_date_iso >= ?')
+            params.append(date_from)
+        date_to = to_iso_date(registered_to)
+        if date_to:
+            where.append('b.registration_date_iso <= ?')
+            params.append(date_to)
+
+        columns = ', '.join(f'b.{field}' for field in FIELDS)
+        if match_parts:
+            sql = (
+                f"SELECT {columns}, bm25(businesses_fts, {', '.join(str(w) for w in RANK_WEIGHTS)}) AS rank "
+                f"FROM businesses_fts JOIN businesses b ON b.id = businesses_fts.rowid "
+                f"WHERE {' AND '.join(where)} ORDER BY rank LIMIT ? OFFSET ?"
+            )
+        else:
+            sql = (
+                f"SELECT {columns}, NULL AS rank FROM businesses b "
+                f"{'WHERE ' + ' AND '.join(where) if where else ''} "
+                f"ORDER BY b.registration_date_iso DESC LIMIT ? OFFSET ?"
+            )
+        params.extend([limit, offset])
+
+        with self.lock:
+            rows = self._connect().execute(sql, params).fetchall()
+
+        return {
+            'results': [dict(row) for row in rows],
+            'count': len(rows),
+            'took_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Indexed business count and the time of the last write from this process"""
+        with self.lock:
+            total = self._connect().execute('SELECT COUNT(*) FROM businesses').fetchone()[0]
+        return {'path': self.path, 'businesses': total, 'last_updated': self.last_updated}
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
@@ -1,10 +1,13 @@
 import requests
 import json
+import os
 
 def test_enhanced_api():
     """Test the enhanced PDF Link Extractor API"""
     
-    base_url = "http://localhost:8000"
+    base_url = os.environ.get("API_BASE_URL", "http://localhost:8000")
+    # mock_qkb_server.py serves an index PDF whose links point at generated registry extracts
+    qkb_base_url = os.environ.get("QKB_BASE_URL", "http://127.0.0.1:8100")
     
     print("=== Testing Enhanced PDF Link Extractor API ===\n")
     
@@ -16,63 +19,42 @@ def test_enhanced_api():
         print(f"❌ Error testing health endpoint: {e}")
         return
     
-    # Test URL processing with the example URL you provided
-    test_urls = [
-        "http://www.qkb.gov.al/umbraco/Surface/SearchSurface/GenerateBulletinExtract?subjectDefCode=3AC4FF72-172E-4173-BC32-1D3E24F2AE41&isSimple=true",
-        # Add more test URLs if you have them
-    ]
-    
-    print(f"\n=== Testing URL Processing ===")
-    print(f"Processing {len(test_urls)} URLs...")
+    # Download an index PDF from the mock origin and have the API process every link in it
+    print(f"\n=== Testing Table Processing ===")
     
     try:
+        index_response = requests.get(f"{qkb_base_url}/index.pdf", params={"count": 5}, timeout=30)
+        index_response.raise_for_status()
+        print(f"Uploading index PDF from {qkb_base_url} ({len(index_response.content)} bytes)...")
+        
         response = requests.post(
-            f"{base_url}/process-pdf-urls",
-            json=test_urls,
+            f"{base_url}/extract-and-process-table",
+            files={'file': ('index.pdf', index_response.content, 'application/pdf')},
             timeout=60  # Give it time to download and process
         )
         
         if response.status_code == 200:
             result = response.json()
-            print(f"✅ URL processing completed!")
+            print(f"✅ Table processing completed!")
             print(f"📊 Summary:")
-            print(f"   - Total URLs: {result['summary']['total_urls']}")
-            print(f"   - Successful: {result['summary']['successful']}")
-            print(f"   - Failed: {result['summary']['failed']}")
-            print(f"   - Skipped: {result['summary']['skipped']}")
+            print(f"   - Links found: {result.get('total_links_found', 0)}")
+            print(f"   - Processed: {result.get('total_processed', 0)}")
+            print(f"   - Businesses found: {result.get('businesses_found', 0)}")
             
-            # Show details for each URL
-            for i, url_result in enumerate(result['results'], 1):
-                print(f"\n📄 URL {i}: {url_result['status'].upper()}")
-                print(f"   URL: {url_result['url']}")
-                
-                if url_result['status'] == 'success' and 'data' in url_result:
-                    data = url_result['data']
-                    content = data.get('content', {})
-                    links = data.get('links', {})
-                    
-                    print(f"   📊 Content Analysis:")
-                    print(f"      - Pages: {content.get('summary', {}).get('total_pages', 0)}")
-                    print(f"      - Characters: {content.get('summary', {}).get('total_characters', 0)}")
-                    print(f"      - Words: {content.get('content_analysis', {}).get('word_count', 0)}")
-                    print(f"      - Links found: {links.get('total_links', 0)}")
-                    
-                    emails = content.get('content_analysis', {}).get('emails_found', [])
-                    if emails:
-                        print(f"      - Emails found: {', '.join(emails[:3])}{'...' if len(emails) > 3 else ''}")
-                    
-                    sample_text = content.get('content_analysis', {}).get('sample_text', '')
-                    if sample_text:
-                        print(f"      - Content sample: {sample_text[:100]}...")
-                        
-                elif url_result['status'] != 'success':
-                    print(f"   ❌ Reason: {url_result.get('reason', 'Unknown error')}")
+            # Show details for each business
+            for i, business in enumerate(result.get('businesses', []), 1):
+                print(f"\n🏢 Business {i}: {business['business_name']}")
+                print(f"   NUIS: {business['nuis']}")
+                print(f"   Legal form: {business['legal_form']}")
+                print(f"   Registered: {business['registration_date']}")
+                print(f"   Address: {business['business_address']}")
+                print(f"   Source: {business['source_url']}")
             
         else:
             print(f"❌ Error: {response.status_code} - {response.text}")
             
     except Exception as e:
-        print(f"❌ Error testing URL processing: {e}")
+        print(f"❌ Error testing table processing: {e}")
     
     # Test file upload (if user provides a file)
     print(f"\n=== Testing File Upload ===")
@@ -102,8 +84,119 @@ def test_enhanced_api():
         except Exception as e:
             print(f"❌ Error testing file upload: {e}")
 
+def test_pdfplumber_fallback(monkeypatch):
+    """Pages PyPDF2 can't read (or reads badly) still come back with text via pdfplumber"""
+    import main
+    from mock_qkb_server import build_registry_bundle
+    
+    pdf_content = build_registry_bundle(20)
+    extract_with_pypdf2 = main.PyPDF2Engine.extract
+    
+    def garble_second_page(self, pdf_content, page_numbers=None):
+        extracted = extract_with_pypdf2(self, pdf_content, page_numbers)
+        if 2 in extracted['pages']:
+            extracted['pages'][2] = {'text': '\ufffd' * 400}
+        return extracted
+    
+    monkeypatch.setattr(main.PyPDF2Engine, 'extract', garble_second_page)
+    text_data = main.pdf_downloader.extract_text_from_pdf(pdf_content)
+    page = text_data['pages'][1]
+    assert page['engine'] == 'pdfplumber'
+    assert 'NUIS' in page['text']
+    assert text_data['engines']['pages'] == {'pypdf2': 19, 'pdfplumber': 1}
+    
+    def unreadable(self, pdf_content, page_numbers=None):
+        raise ValueError("broken xref table")
+    
+    monkeypatch.setattr(main.PyPDF2Engine, 'extract', unreadable)
+    text_data = main.pdf_downloader.extract_text_from_pdf(pdf_content)
+    assert 'error' not in text_data
+    assert len(text_data['pages']) == 20
+    assert all(page['engine'] == 'pdfplumber' and page['text'] for page in text_data['pages'])
+
+def test_download_timeout_recovers_after_host_slows_down(monkeypatch):
+    """Timed-out downloads count as latency samples, so a host that slowed down gets a longer timeout"""
+    import main
+    import pytest
+    
+    host = 'slow.example'
+    url = f'http://{host}/extract.pdf'
+    monkeypatch.setattr(main.pdf_downloader, 'host_latency', main.HostLatencyTracker())
+    tracker = main.pdf_downloader.host_latency
+    for _ in range(main.LATENCY_MIN_SAMPLES):
+        tracker.observe(host, 0.05)
+    assert tracker.timeout_for(host) == main.DOWNLOAD_TIMEOUT_MIN
+    
+    def timed_out(*args, **kwargs):
+        raise requests.exceptions.ReadTimeout(f"Read timed out. (read timeout={kwargs['timeout']})")
+    
+    monkeypatch.setattr(main.pdf_downloader.session, 'get', timed_out)
+    with pytest.raises(main.TransientDownloadError):
+        main.pdf_downloader.download_pdf(url)
+    assert tracker.timeout_for(host) > main.DOWNLOAD_TIMEOUT_MIN
+
+def test_not_modified_carries_the_encoded_etag():
+    """A 304 names the same per-encoding ETag and Vary the 200 for that request would"""
+    import main
+    import orjson
+    from starlette.requests import Request
+    
+    def request(headers):
+        return Request({'type': 'http', 'method': 'GET', 'path': '/',
+                        'headers': [(name.encode(), value.encode()) for name, value in headers.items()]})
+    
+    etag = main.compute_etag('test-not-modified', 'hash', {})
+    body = b'{"pages": "' + b'x' * main.COMPRESSION_MIN_SIZE + b'"}'
+    full = main.cacheable_response(request({'accept-encoding': 'gzip'}), etag, orjson.loads(body))
+    assert full.headers['etag'] == f'{etag[:-1]}-gzip"'
+    
+    revalidate = {'accept-encoding': 'gzip', 'if-none-match': full.headers['etag']}
+    not_modified = main.cached_response(request(revalidate), etag)
+    assert not_modified.status_code == 304
+    assert not_modified.headers['etag'] == full.headers['etag']
+    assert not_modified.headers['vary'] == 'Accept-Encoding'
+    
+    # Still right once the body has been evicted from the response cache
+    main.response_cache.size -= len(main.response_cache.entries.pop(etag))
+    not_modified = main.cached_response(request(revalidate), etag)
+    assert not_modified.headers['etag'] == full.headers['etag']
+    assert not_modified.headers['vary'] == 'Accept-Encoding'
+
+def test_split_registry_records():
+    """Records split on extract headers, falling back to NUIS lines only when there are none"""
+    from main import split_registry_records
+    
+    def extract(nuis, shareholder_nuis=None):
+        text = (f"EKSTRAKT I REGJISTRIT TREGTAR\n"
+                f"Numri unik i identifikimit të subjektit (NUIS) {nuis}\n"
+                f"Emri i subjektit Shoqeria {nuis} sh.p.k\n")
+        if shareholder_nuis:
+            text += f"Ortaku: Numri unik i identifikimit të subjektit (NUIS) {shareholder_nuis}\n"
+        return text
+    
+    # A shareholder's NUIS inside one extract doesn't start a second record
+    single = extract('K11111111A', shareholder_nuis='L22222222B')
+    assert split_registry_records(single) == [(0, len(single))]
+    
+    # One span per header, with the bundle cover going to the first record
+    records = [extract('K11111111A', shareholder_nuis='L99999999Z'), extract('K22222222B'), extract('K33333333C')]
+    bundle = 'QENDRA KOMBETARE E BIZNESIT\n' + ''.join(records)
+    spans = split_registry_records(bundle)
+    assert len(spans) == 3
+    assert spans[0][0] == 0 and spans[-1][1] == len(bundle)
+    assert [bundle[start:end].count('EKSTRAKT I REGJISTRIT TREGTAR') for start, end in spans] == [1, 1, 1]
+    assert 'K22222222B' in bundle[slice(*spans[1])]
+    
+    # Without headers (e.g. a header the extraction engine lost) NUIS lines mark the records
+    headerless = ''.join(record.replace('EKSTRAKT I REGJISTRIT TREGTAR\n', '')
+                         for record in (extract('K11111111A'), extract('K22222222B')))
+    spans = split_registry_records(headerless)
+    assert len(spans) == 2
+    assert ['K11111111A' in headerless[slice(*span)] for span in spans] == [True, False]
+    assert 'K22222222B' in headerless[slice(*spans[1])]
+
 if __name__ == "__main__":
     print("🚀 Enhanced PDF Link Extractor API Test")
     print("Make sure the server is running on http://localhost:8000")
-    print("This will test the new URL downloading and processing functionality.\n")
+    print("Start mock_qkb_server.py on port 8100 (or set QKB_BASE_URL) for the table processing test.\n")
     test_enhanced_api()
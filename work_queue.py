@@ -0,0 +1,223 @@
+"""Shared work queue for queue worker processes.
+
+The API enqueues a batch of URLs; any number of ``worker.py`` processes lease
+tasks, run them through the download/parse pipeline and write results back.
+The database runs in WAL mode, which SQLite only supports on a local
+filesystem, so the API and its workers must run on the same host.
+A lease expires after ``visibility_timeout`` seconds unless the worker extends
+it, so tasks held by a crashed worker become visible again and are retried,
+up to ``max_attempts`` times. Results are only accepted from the current lease
+holder, which makes a late write from an expired lease harmless.
+"""
+
+from typing import List, Dict, Any, Optional
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    source TEXT,
+    total INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    batch_id TEXT NOT NULL REFERENCES batches(id),
+    url TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_token TEXT,
+    lease_expires REAL,
+    worker_id TEXT,
+    result BLOB,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, lease_expires);
+CREATE INDEX IF NOT EXISTS idx_tasks_batch ON tasks(batch_id, status);
+"""
+
+
+class SQLiteWorkQueue:
+    """Lease-based task queue in a SQLite file shared by the API and the workers"""
+
+    def __init__(self, path: str, visibility_timeout: float = 120, max_attempts: int = 3):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so processes that never touch the queue don't create the file
+        if self.connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit mode; write paths take the lock explicitly with BEGIN IMMEDIATE
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self.connection = connection
+        return self.connection
+
+    def create_batch(self, urls: List[str], source: str = '') -> str:
+        """Enqueue one task per URL and return the batch id"""
+        batch_id = uuid.uuid4().hex
+        now = time.time()
+        with self.lock:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute(
+                    'INSERT INTO batches (id, source, total, created_at) VALUES (?, ?, ?, ?)',
+                    (batch_id, source, len(urls), datetime.now().isoformat())
+                )
+                connection.executemany(
+                    'INSERT INTO tasks (batch_id, url, updated_at) VALUES (?, ?, ?)',
+                    [(batch_id, url, now) for url in urls]
+                )
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+        return batch_id
+
+    def lease(self, worker_id: str, limit: int = 1) -> List[Dict[str, Any]]:
+        """Lease up to ``limit`` queued (or lease-expired) tasks for ``worker_id``"""
+        now = time.time()
+        with self.lock:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                # Tasks whose last allowed attempt ran out of time are given up on
+                connection.execute(
+                    "UPDATE tasks SET status = 'failed', lease_token = NULL, updated_at = ?, result = ? "
+                    "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, orjson.dumps({'status': 'error', 'reason': 'Lease expired on final attempt'}),
+                     now, self.max_attempts)
+                )
+                rows = connection.execute(
+                    "UPDATE tasks SET status = 'leased', attempts = attempts + 1, lease_token = lower(hex(randomblob(16))), "
+                    "lease_expires = ?, worker_id = ?, updated_at = ? "
+                    "WHERE id IN ("
+                    "  SELECT id FROM tasks WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?) "
+                    "  ORDER BY id LIMIT ?"
+                    ") RETURNING id, batch_id, url, attempts, lease_token",
+                    (now + self.visibility_timeout, worker_id, now, now, limit)
+                ).fetchall()
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+        return [dict(row) for row in rows]
+
+    def extend(self, task_id: int, lease_token: str) -> bool:
+        """Push a held lease's expiry out by another visibility timeout; False if it was lost"""
+        now = time.time()
+        with self.lock:
+            cursor = self._connect().execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (now + self.visibility_timeout, now, task_id, lease_token)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: int, lease_token: str, result: Dict[str, Any], failed: bool = False) -> bool:
+        """Store a task's result; ignored (False) unless the caller still holds the lease"""
+        with self.lock:
+            cursor = self._connect().execute(
+                "UPDATE tasks SET status = ?, result = ?, lease_token = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                ('failed' if failed else 'done', orjson.dumps(result, default=str), time.time(), task_id, lease_token)
+            )
+        return cursor.rowcount == 1
+
+    def retry(self, task_id: int, lease_token: str) -> bool:
+        """Make a task that failed on this attempt visible again straight away"""
+        with self.lock:
+            cursor = self._connect().execute(
+                "UPDATE tasks SET status = 'queued', lease_token = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (time.time(), task_id, lease_token)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, task_id: int, lease_token: str) -> bool:
+        """Give a leased task back to the queue without counting the attempt (e.g. on worker shutdown)"""
+        with self.lock:
+            cursor = self._connect().execute(
+                "UPDATE tasks SET status = 'queued', attempts = attempts - 1, lease_token = NULL, lease_expires = NULL, "
+                "updated_at = ? "
+                "WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (time.time(), task_id, lease_token)
+            )
+        return cursor.rowcount == 1
+
+    def batch_status(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Task counts by status for a batch, or None if it doesn't exist"""
+        with self.lock:
+            connection = self._connect()
+            batch = connection.execute('SELECT * FROM batches WHERE id = ?', (batch_id,)).fetchone()
+            if batch is None:
+                return None
+            counts = dict(connection.execute(
+                'SELECT status, COUNT(*) FROM tasks WHERE batch_id = ? GROUP BY status', (batch_id,)
+            ).fetchall())
+        finished = counts.get('done', 0) + counts.get('failed', 0)
+        return {
+            'batch_id': batch_id,
+            'source': batch['source'],
+            'created_at': batch['created_at'],
+            'total': batch['total'],
+            'statuses': counts,
+            'finished': finished,
+            'complete': finished >= batch['total']
+        }
+
+    def batch_results(self, batch_id: str) -> List[Dict[str, Any]]:
+        """Stored results of a batch's finished tasks, in enqueue order"""
+        with self.lock:
+            rows = self._connect().execute(
+                "SELECT url, result FROM tasks WHERE batch_id = ? AND status IN ('done', 'failed') ORDER BY id",
+                (batch_id,)
+            ).fetchall()
+        return [{'url': row['url'], **orjson.loads(row['result'])} for row in rows if row['result']]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self.lock:
+            connection = self._connect()
+            counts = dict(connection.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall())
+            expired = connection.execute(
+                "SELECT COUNT(*) FROM tasks WHERE status = 'leased' AND lease_expires < ?", (now,)
+            ).fetchone()[0]
+            workers = connection.execute(
+                "SELECT COUNT(DISTINCT worker_id) FROM tasks WHERE status = 'leased' AND lease_expires >= ?", (now,)
+            ).fetchone()[0]
+        return {
+            'path': self.path,
+            'statuses': counts,
+            'expired_leases': expired,
+            'active_workers': workers,
+            'visibility_timeout': self.visibility_timeout,
+            'max_attempts': self.max_attempts
+        }
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
@@ -0,0 +1,161 @@
+"""Queue worker: runs the download/parse pipeline outside the API process.
+
+Leases URL tasks from the shared work queue (see work_queue.py), processes
+them with the same pipeline as the API and writes compact results back for
+``GET /batches/{batch_id}`` to aggregate. Start as many as the hardware allows
+on the API's host; the SQLite queue file can't be shared across machines:
+
+    python worker.py --concurrency 16
+"""
+
+from dataclasses import asdict
+from typing import Dict, Any, Set
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+
+from main import pdf_downloader, BusinessRow, work_queue
+from work_queue import SQLiteWorkQueue
+
+logger = logging.getLogger("worker")
+
+
+def compact_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a process_url_liberal result the API aggregates"""
+    return {
+        'status': result.get('status'),
+        'reason': result.get('reason'),
+        'file_size': result.get('data', {}).get('file_size', 0),
+        'businesses': [asdict(business) for business in BusinessRow.rows_from_result(result)]
+    }
+
+
+class QueueWorker:
+    """Keeps up to ``concurrency`` leased tasks in flight, extending leases while they run"""
+
+    def __init__(self, queue: SQLiteWorkQueue, worker_id: str, concurrency: int, poll_interval: float = 1.0):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stopping = False
+        self.running: Set[asyncio.Future] = set()
+        self.stats = {'completed': 0, 'retried': 0, 'failed': 0, 'lost_leases': 0, 'released': 0, 'crashed': 0}
+
+    def stop(self):
+        """First call finishes the leased tasks; a second cancels them and releases their leases"""
+        if self.stopping:
+            logger.info("Stopping now: releasing leased tasks back to the queue")
+            for future in self.running:
+                future.cancel()
+            return
+        logger.info("Stopping: finishing leased tasks, not leasing new ones (signal again to release them)")
+        self.stopping = True
+
+    async def heartbeat(self, task: Dict[str, Any]):
+        """Extend the lease every third of the visibility timeout until cancelled"""
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.queue.visibility_timeout / 3)
+            if not await loop.run_in_executor(None, self.queue.extend, task['id'], task['lease_token']):
+                logger.warning(f"Lost lease on task {task['id']}; another worker may retry it")
+                self.stats['lost_leases'] += 1
+                return
+
+    async def process(self, task: Dict[str, Any]):
+        loop = asyncio.get_event_loop()
+        heartbeat = asyncio.ensure_future(self.heartbeat(task))
+        try:
+            result = await pdf_downloader.process_url_liberal(task['url'])
+        except asyncio.CancelledError:
+            # Hand the task straight back without spending one of its attempts
+            await loop.run_in_executor(None, self.queue.release, task['id'], task['lease_token'])
+            self.stats['released'] += 1
+            raise
+        finally:
+            heartbeat.cancel()
+
+        # Errors are retried until the attempts run out; skipped URLs are a final answer
+        if result['status'] == 'error' and task['attempts'] < self.queue.max_attempts:
+            await loop.run_in_executor(None, self.queue.retry, task['id'], task['lease_token'])
+            self.stats['retried'] += 1
+            return
+        failed = result['status'] == 'error'
+        stored = await loop.run_in_executor(
+            None, self.queue.complete, task['id'], task['lease_token'], compact_result(result), failed
+        )
+        if not stored:
+            self.stats['lost_leases'] += 1
+        elif failed:
+            self.stats['failed'] += 1
+        else:
+            self.stats['completed'] += 1
+
+    def reap(self, done: Set[asyncio.Future]):
+        """Log tasks that died with an unexpected error; their lease expires and they are retried"""
+        for future in done:
+            if future.cancelled() or future.exception() is None:
+                continue
+            self.stats['crashed'] += 1
+            logger.error("Task processing failed", exc_info=future.exception())
+
+    async def run(self):
+        loop = asyncio.get_event_loop()
+        last_report = time.monotonic()
+        logger.info(f"Worker {self.worker_id} leasing from {self.queue.path} (concurrency {self.concurrency})")
+
+        while not self.stopping:
+            free = self.concurrency - len(self.running)
+            leased = []
+            if free > 0:
+                leased = await loop.run_in_executor(None, self.queue.lease, self.worker_id, free)
+                self.running.update(asyncio.ensure_future(self.process(task)) for task in leased)
+
+            if not self.running:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            # Wait for a free slot; poll again sooner if the queue had less work than we could take
+            timeout = None if len(leased) == free else self.poll_interval
+            done, self.running = await asyncio.wait(self.running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            self.reap(done)
+
+            if time.monotonic() - last_report >= 30:
+                logger.info(f"Worker stats: {self.stats}, in flight: {len(self.running)}")
+                last_report = time.monotonic()
+
+        if self.running:
+            done, self.running = await asyncio.wait(self.running)
+            self.reap(done)
+        logger.info(f"Worker stopped: {self.stats}")
+
+
+async def serve(worker: QueueWorker):
+    loop = asyncio.get_event_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        pdf_downloader.parse_pool.shutdown()
+        work_queue.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process URL tasks from the shared work queue")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("WORKER_CONCURRENCY", 16)),
+                        help="Tasks in flight at once")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between polls of an empty queue")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}:{os.getpid()}")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    worker = QueueWorker(work_queue, args.worker_id, args.concurrency, args.poll_interval)
+    asyncio.run(serve(worker))
+
+
+if __name__ == "__main__":
+    main()